@@ -1,20 +1,52 @@
 import os
 import sys
+import json
 from flask import Flask, render_template, request, jsonify
 
 # Add the project folder to sys.path for imports
 project_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_path)
 
-from utils.stock_data import get_stock_info
+from utils.stock_data import get_stock_info, get_stock_data
 from utils.closing_price import plot_closing_prices
 from utils.indicators import calculate_smas_and_opinion, calculate_and_plot_rsi, calculate_and_plot_macd
 from utils.prophet_model import predict_and_plot_prophet
+from utils.forecasting import DEFAULT_FORECASTER, backtest_forecasters
 from utils.sentiment_analysis import sentiment_news_analysis
 from utils.RAG_model import fetch_financial_data, ask_openai_about_data
+from utils.downsampling import points_for_width
+from utils.portfolio import analyze_portfolio
+from utils.warmup import record_access, is_warm, warm_hit_rate, start_warmup_scheduler, WARMUP_INTERVAL, WARMUP_UNTIL
+from utils.shared_data import SHARED_DATA_DIR, start_shared_data_refresher
+from utils.alerts import load_alerts, add_rule, start_alert_scheduler, file_sink, webhook_sink, ALERTS_LOG_PATH
 
 app = Flask(__name__)
 
+# Background jobs are started by every worker process. A file lock lets a single one of them refresh the
+# shared data and evaluate the alerts, while every worker warms its own in-memory caches. With
+# `python main.py`, the debug reloader's parent process only watches the files and serves nothing,
+# so the jobs are started in its child process.
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    # With several worker processes, share the price history of the hot tickers through SHARED_DATA_DIR
+    if SHARED_DATA_DIR:
+        start_shared_data_refresher(n=int(os.getenv('SHARED_DATA_TOP_N', 200)))
+
+    # Evaluate the alert rules periodically when ALERTS_INTERVAL (in seconds) is set
+    if os.getenv('ALERTS_INTERVAL'):
+        webhook_url = os.getenv('ALERTS_WEBHOOK_URL')
+        sink = webhook_sink(webhook_url) if webhook_url else file_sink(ALERTS_LOG_PATH)
+        start_alert_scheduler(int(os.getenv('ALERTS_INTERVAL')), sink=sink)
+
+    # Warm the caches for the WARMUP_TOP_N most requested tickers at startup, every day at WARMUP_TIME,
+    # and again every WARMUP_INTERVAL seconds until WARMUP_UNTIL
+    if os.getenv('WARMUP_TOP_N'):
+        start_warmup_scheduler(
+            at=os.getenv('WARMUP_TIME', '09:00'),
+            n=int(os.getenv('WARMUP_TOP_N')),
+            until=os.getenv('WARMUP_UNTIL', WARMUP_UNTIL),
+            interval_seconds=int(os.getenv('WARMUP_INTERVAL', WARMUP_INTERVAL))
+        )
+
 @app.route('/')
 def home():
     """
@@ -31,33 +63,43 @@ def search():
     try:
         ticker = request.form['ticker'].upper()
 
+        # Limit the number of points per trace to what the chart viewport can display
+        max_points = points_for_width(request.form.get('width', type=float))
+
+        # Whether the slowest results of the request were precomputed by the warm-up
+        forecaster = request.form.get('forecaster', DEFAULT_FORECASTER)
+        warm = is_warm(ticker, forecaster)
+
         # Fetch stock information
         stock_info = get_stock_info(ticker)
         if stock_info is None:
             return jsonify({"error": f"Failed to fetch stock information for ticker {ticker}."}), 400
 
+        # Only count the requests for valid tickers, the warm-up ranks the tickers by these counts
+        record_access(ticker, warm=warm)
+
         # Fetch and plot closing prices
-        closing_prices_result, closing_prices_fig = plot_closing_prices(ticker)
+        closing_prices_result, closing_prices_plot = plot_closing_prices(ticker, max_points=max_points, as_html=True)
         if "error" in closing_prices_result:
             return jsonify({"error": closing_prices_result["error"]}), 400
 
         # Calculate SMA and opinion
-        sma_result = calculate_smas_and_opinion(ticker, plot=True)
+        sma_result = calculate_smas_and_opinion(ticker, plot=True, max_points=max_points, as_html=True)
         if "error" in sma_result:
             return jsonify({"error": sma_result["error"]}), 400
 
         # Calculate MACD and opinion
-        rsi_result = calculate_and_plot_rsi(ticker, plot=True)
+        rsi_result = calculate_and_plot_rsi(ticker, plot=True, max_points=max_points, as_html=True)
         if "error" in rsi_result:
             return jsonify({"error": rsi_result["error"]}), 400
 
         # Calculate Bollinger Bands and opinion
-        macd_result = calculate_and_plot_macd(ticker, plot=True)
+        macd_result = calculate_and_plot_macd(ticker, plot=True, max_points=max_points, as_html=True)
         if "error" in macd_result:
             return jsonify({"error": macd_result["error"]}), 400
 
-        # Use Prophet for predictions
-        prophet_result, prophet_fig = predict_and_plot_prophet(ticker, forecast_period=60)
+        # Use Prophet, or the requested forecasting backend, for predictions
+        prophet_result, prophet_plot = predict_and_plot_prophet(ticker, forecast_period=60, max_points=max_points, backend=forecaster, as_html=True)
         if "error" in prophet_result:
             return jsonify({"error": prophet_result["error"]}), 400
 
@@ -70,18 +112,18 @@ def search():
         return jsonify({
             "stock_info": stock_info,
             "closing_prices": closing_prices_result,
-            "closing_prices_plot": closing_prices_fig.to_html(full_html=False),
+            "closing_prices_plot": closing_prices_plot,
             "sma_opinion": sma_result["opinion"],
-            "sma_plot": sma_result["plot"].to_html(full_html=False),
+            "sma_plot": sma_result["plot"],
             "rsi_opinion": rsi_result["opinion"],
-            "rsi_plot": rsi_result["plot"].to_html(full_html=False),
+            "rsi_plot": rsi_result["plot"],
             "macd_opinion": macd_result["opinion"],
-            "macd_plot": macd_result["plot"].to_html(full_html=False),
+            "macd_plot": macd_result["plot"],
             "prophet_prediction": {
                 "prediction_message": prophet_result["prediction_message"],
                 "date": prophet_result["latest_date"]
             },
-            "prophet_plot": prophet_fig.to_html(full_html=False),
+            "prophet_plot": prophet_plot,
             "sentiment_distribution": sentiment_result["distribution_html"],
             "sentiment_proportion": sentiment_result["proportion_html"],
             "sentiment_summary": sentiment_result["summary_html"]
@@ -91,6 +133,117 @@ def search():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/zoom', methods=['POST'])
+def zoom():
+    """
+    Return the traces of a single chart for the zoomed date range.
+
+    The range is plotted at full resolution unless it still holds more points than the viewport can display.
+    """
+    try:
+        ticker = request.form['ticker'].upper()
+        panel = request.form['panel']
+        x_range = (request.form.get('start'), request.form.get('end'))
+        max_points = points_for_width(request.form.get('width', type=float))
+
+        if panel == 'closing_prices':
+            result, fig = plot_closing_prices(ticker, max_points=max_points, x_range=x_range)
+        elif panel == 'sma':
+            result = calculate_smas_and_opinion(ticker, plot=True, max_points=max_points, x_range=x_range)
+            fig = result.get("plot")
+        elif panel == 'rsi':
+            result = calculate_and_plot_rsi(ticker, plot=True, max_points=max_points, x_range=x_range)
+            fig = result.get("plot")
+        elif panel == 'macd':
+            result = calculate_and_plot_macd(ticker, plot=True, max_points=max_points, x_range=x_range)
+            fig = result.get("plot")
+        else:
+            return jsonify({"error": f"Zooming is not supported for panel '{panel}'."}), 400
+
+        if "error" in result:
+            return jsonify({"error": result["error"]}), 400
+
+        # Only send the data of each trace, the layout stays as it is in the browser
+        traces = json.loads(fig.to_json())["data"]
+        return jsonify({"traces": [{"x": trace["x"], "y": trace["y"]} for trace in traces]})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/portfolio', methods=['POST'])
+def portfolio():
+    """
+    Compute the risk metrics of a portfolio given as {"holdings": {ticker: weight}, "benchmark": ticker}.
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        if not payload.get("holdings"):
+            return jsonify({"error": "No holdings given."}), 400
+
+        result = analyze_portfolio(
+            payload["holdings"],
+            benchmark=payload.get("benchmark", "SPY"),
+            period=payload.get("period", "1y"),
+            confidence=payload.get("confidence", 0.95),
+            horizon=payload.get("horizon", 1)
+        )
+        if "error" in result:
+            return jsonify({"error": result["error"]}), 400
+
+        result["returns"] = {str(date): value for date, value in result["returns"].items()}
+        result["risk_contributions"] = result["risk_contributions"].to_dict(orient="index")
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/forecast_backtest', methods=['POST'])
+def forecast_backtest():
+    """
+    Compare the latency and backtested error of the forecasting backends for a ticker.
+    """
+    try:
+        ticker = request.form['ticker'].upper()
+        horizon = request.form.get('horizon', 60, type=int)
+
+        data = get_stock_data(ticker, period="5y")
+        if data is None:
+            return jsonify({"error": f"Failed to fetch stock data for ticker {ticker}."}), 400
+
+        history = data.reset_index().rename(columns={'index': 'ds', 'Close': 'y'})[['ds', 'y']]
+        return jsonify(backtest_forecasters(history, horizon=horizon))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/warmup_stats', methods=['GET'])
+def warmup_stats():
+    """
+    Return the share of a day's requests that were served from a warm cache.
+    """
+    return jsonify(warm_hit_rate(request.args.get('day')))
+
+
+@app.route('/alerts', methods=['GET', 'POST'])
+def alerts():
+    """
+    List the watchlist and alert rules, or add an alert rule.
+    """
+    try:
+        if request.method == 'GET':
+            return jsonify(load_alerts())
+
+        rule = request.get_json(silent=True) or {}
+        return jsonify({"rule": add_rule(rule)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/ask_question', methods=['POST'])
 def ask_question():
     """
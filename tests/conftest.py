@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Add the project root directory to sys.path
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_path)
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.alerts as alerts
+from utils.indicators import compute_rsi, compute_macd
+
+
+@pytest.fixture
+def close():
+    index = pd.bdate_range("2026-01-01", periods=120)
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(100 + rng.normal(0, 1, (120, 3)).cumsum(axis=0), index=index, columns=["AAA", "BBB", "CCC"])
+
+
+def test_compute_indicators_matches_full_history(close):
+    indicators = alerts.compute_indicators(close)
+    _, _, macd, signal_line = compute_macd(close)
+    expected = {
+        "close": close,
+        "sma_20": close.rolling(window=20).mean(),
+        "sma_50": close.rolling(window=50).mean(),
+        "rsi": compute_rsi(close),
+        "macd": macd,
+        "signal": signal_line,
+        "histogram": macd - signal_line,
+    }
+    for name, frame in expected.items():
+        pd.testing.assert_frame_equal(indicators[name], frame.tail(2), check_freq=False)
+
+
+def test_evaluate_rule_crossings():
+    index = pd.to_datetime(["2026-01-01", "2026-01-02"])
+    indicators = {
+        "rsi": pd.DataFrame({"UP": [65.0, 75.0], "STAY": [75.0, 80.0], "DOWN": [75.0, 65.0]}, index=index),
+        "macd": pd.DataFrame({"UP": [-1.0, 1.0], "STAY": [1.0, 2.0], "DOWN": [1.0, -1.0]}, index=index),
+        "signal": pd.DataFrame({"UP": [0.0, 0.0], "STAY": [0.0, 0.0], "DOWN": [0.0, 0.0]}, index=index),
+    }
+    tickers = ["UP", "STAY", "DOWN"]
+
+    crosses_above = {"indicator": "rsi", "condition": "crosses_above", "value": 70}
+    assert list(alerts.evaluate_rule(crosses_above, indicators, tickers).index) == ["UP"]
+
+    crosses_below = {"indicator": "rsi", "condition": "crosses_below", "value": 70}
+    assert list(alerts.evaluate_rule(crosses_below, indicators, tickers).index) == ["DOWN"]
+
+    above = {"indicator": "rsi", "condition": "above", "value": 70}
+    assert list(alerts.evaluate_rule(above, indicators, tickers).index) == ["UP", "STAY"]
+
+    macd_crosses_signal = {"indicator": "macd", "condition": "crosses_above", "value": "signal"}
+    fired = alerts.evaluate_rule(macd_crosses_signal, indicators, tickers)
+    assert fired.to_dict() == {"UP": 1.0}
+
+
+def test_changed_tickers_updates_state():
+    index = pd.to_datetime(["2026-01-01", "2026-01-02"])
+    close = pd.DataFrame({"AAA": [1.0, 2.0], "BBB": [3.0, np.nan], "CCC": [np.nan, np.nan]}, index=index)
+
+    state = {"AAA": ["2026-01-02", 2.0]}
+    assert alerts.changed_tickers(close, state) == ["BBB"]
+    assert state == {"AAA": ["2026-01-02", 2.0], "BBB": ["2026-01-01", 3.0]}
+
+    close.loc[index[-1], "AAA"] = 2.5
+    assert alerts.changed_tickers(close, state) == ["AAA"]
+    assert state["AAA"] == ["2026-01-02", 2.5]
+
+
+def test_run_alerts_fires_once_per_bar(tmp_path, monkeypatch):
+    index = pd.bdate_range("2026-01-01", periods=30)
+    close = pd.DataFrame({"AAA": np.r_[np.full(29, 10.0), 12.0], "BBB": np.full(30, 10.0)}, index=index)
+    monkeypatch.setattr(alerts, "fetch_closes", lambda tickers, period="1y": close[tickers])
+
+    alerts_path, state_path = str(tmp_path / "alerts.json"), str(tmp_path / "state.json")
+    alerts.save_alerts({"watchlist": ["AAA", "BBB"], "rules": []}, alerts_path)
+    alerts.add_rule({"id": "breakout", "indicator": "close", "condition": "crosses_above", "value": "sma_20"}, alerts_path)
+
+    delivered = []
+    fired = alerts.run_alerts(alerts_path, state_path, sink=delivered.extend)
+    assert [(alert["rule"], alert["ticker"], alert["date"]) for alert in fired] == [("breakout", "AAA", "2026-02-11")]
+
+    # The latest bar is updated during the session, the crossing must not be delivered again
+    close.iloc[-1, 0] = 12.5
+    assert alerts.run_alerts(alerts_path, state_path, sink=delivered.extend) == []
+    assert len(delivered) == 1
+
+    with open(state_path) as f:
+        state = json.load(f)
+    assert state["bars"]["AAA"] == ["2026-02-11", 12.5]
+    assert state["fired"] == [["breakout", "AAA", "2026-02-11"]]
+
+
+def test_run_alerts_reads_old_state_format(tmp_path, monkeypatch):
+    index = pd.bdate_range("2026-01-01", periods=30)
+    close = pd.DataFrame({"AAA": np.r_[np.full(29, 10.0), 12.0]}, index=index)
+    monkeypatch.setattr(alerts, "fetch_closes", lambda tickers, period="1y": close[tickers])
+
+    alerts_path, state_path = str(tmp_path / "alerts.json"), str(tmp_path / "state.json")
+    alerts.save_alerts({"watchlist": ["AAA"], "rules": []}, alerts_path)
+    alerts.add_rule({"id": "high", "indicator": "close", "condition": "above", "value": 11}, alerts_path)
+    with open(state_path, "w") as f:
+        json.dump({"AAA": ["2026-01-28", 10.0]}, f)
+
+    fired = alerts.run_alerts(alerts_path, state_path, sink=lambda fired_alerts: None)
+    assert [alert["ticker"] for alert in fired] == ["AAA"]
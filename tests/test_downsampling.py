@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from utils.downsampling import lttb_indices, points_for_width, slice_to_range
+
+
+def test_lttb_keeps_ends_and_extremes():
+    y = np.sin(np.linspace(0, 6 * np.pi, 1000))
+    y[437] = 5.0
+    indices = lttb_indices(y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    assert 437 in indices
+
+
+def test_lttb_keeps_short_series():
+    assert lttb_indices([1.0, 2.0, 3.0], 10).tolist() == [0, 1, 2]
+    assert lttb_indices(np.arange(50.0), None).tolist() == list(range(50))
+
+
+def test_points_for_width():
+    assert points_for_width(None) is None
+    assert points_for_width(1234.5) == 1234
+    assert points_for_width(50) == 200
+
+
+def test_slice_to_range_keeps_surrounding_rows():
+    df = pd.DataFrame({"a": range(10)}, index=pd.bdate_range("2026-10-01", periods=10).date)
+    # A weekend holds no row, the rows around it are kept
+    assert slice_to_range(df, ("2026-10-03", "2026-10-04"))["a"].tolist() == [1, 2]
+    assert slice_to_range(df, ("2026-10-06", "2026-10-08"))["a"].tolist() == [2, 3, 4, 5, 6]
+    assert slice_to_range(df, ("", "")) is df
@@ -0,0 +1,29 @@
+import numpy as np
+
+from utils.portfolio import horizon_returns, monte_carlo_var, value_at_risk
+
+
+def test_value_at_risk():
+    returns = np.linspace(-0.10, 0.09, 20)
+    var, cvar = value_at_risk(returns, confidence=0.9)
+    losses = -returns
+    assert var == np.quantile(losses, 0.9)
+    assert cvar == losses[losses >= var].mean()
+    assert cvar >= var
+
+
+def test_horizon_returns_compound_overlapping_windows():
+    returns = np.array([0.1, -0.1, 0.05, 0.0])
+    np.testing.assert_allclose(horizon_returns(returns, 2), [1.1 * 0.9 - 1, 0.9 * 1.05 - 1, 0.05])
+    np.testing.assert_array_equal(horizon_returns(returns, 1), returns)
+
+
+def test_monte_carlo_var_matches_normal_quantile():
+    # Two independent assets with 1% daily volatility, equally weighted
+    covariance = np.diag([1e-4, 1e-4])
+    weights = np.array([0.5, 0.5])
+    var, cvar = monte_carlo_var(np.zeros(2), covariance, weights, confidence=0.95, simulations=200_000, horizon=4, seed=0)
+
+    volatility = np.sqrt(weights @ covariance @ weights * 4)
+    assert abs(var - 1.6449 * volatility) < 0.02 * var
+    assert abs(cvar - 2.0627 * volatility) < 0.02 * cvar
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from utils.resampling import resample_ohlcv, slice_period, fetch_latest_bars
+
+TZ = "America/New_York"
+
+
+def daily_bars(start, periods):
+    index = pd.bdate_range(start, periods=periods, tz=TZ)
+    values = np.arange(1, periods + 1, dtype=float)
+    return pd.DataFrame({
+        "Open": values,
+        "High": values + 0.5,
+        "Low": values - 0.5,
+        "Close": values + 0.25,
+        "Volume": np.full(periods, 100.0),
+    }, index=index)
+
+
+def test_resample_weekly_bars():
+    # Wednesday 2026-01-07 to Tuesday 2026-01-20: a partial week, a full week and a partial week
+    data = daily_bars("2026-01-07", 10)
+    weekly = resample_ohlcv(data, "1wk")
+
+    assert list(weekly.index.strftime("%Y-%m-%d")) == ["2026-01-05", "2026-01-12", "2026-01-19"]
+    assert weekly["Open"].tolist() == [1.0, 4.0, 9.0]
+    assert weekly["High"].tolist() == [3.5, 8.5, 10.5]
+    assert weekly["Low"].tolist() == [0.5, 3.5, 8.5]
+    assert weekly["Close"].tolist() == [3.25, 8.25, 10.25]
+    assert weekly["Volume"].tolist() == [300.0, 500.0, 200.0]
+
+
+def test_resample_monthly_bars_skip_empty_periods():
+    # No bar in February
+    data = pd.concat([daily_bars("2026-01-28", 3), daily_bars("2026-03-02", 2)])
+    monthly = resample_ohlcv(data, "1mo")
+
+    assert list(monthly.index.strftime("%Y-%m-%d")) == ["2026-01-01", "2026-03-01"]
+    assert monthly["Open"].tolist() == [1.0, 1.0]
+    assert monthly["Close"].tolist() == [3.25, 2.25]
+    assert monthly["Volume"].tolist() == [300.0, 200.0]
+
+
+def test_daily_bars_are_not_resampled():
+    data = daily_bars("2026-01-07", 5)
+    assert resample_ohlcv(data, "1d") is data
+
+
+def test_trading_day_periods_count_bars():
+    # The last bar is on a Wednesday, five calendar days would only hold four bars
+    data = daily_bars("2025-12-01", 38)
+    assert data.index[-1].day_name() == "Wednesday"
+    assert len(slice_period(data, "5d")) == 5
+    assert slice_period(data, "1d").index[0] == data.index[-1]
+
+
+class FakeTicker:
+    def __init__(self, history):
+        self._history = history
+
+    def history(self, start=None, interval="1d", **kwargs):
+        return self._history[self._history.index >= pd.Timestamp(start, tz=TZ)]
+
+
+def test_fetch_latest_bars_replaces_the_last_bar():
+    cached = daily_bars("2026-01-05", 5)
+    latest = daily_bars("2026-01-05", 7)
+    latest["Close"] += 1
+    latest["Dividends"] = 0.0
+    latest["Stock Splits"] = 0.0
+
+    merged = fetch_latest_bars(FakeTicker(latest), cached)
+    assert len(merged) == 7
+    assert merged["Close"].iloc[:4].tolist() == cached["Close"].iloc[:4].tolist()
+    assert merged["Close"].iloc[4:].tolist() == latest["Close"].iloc[4:].tolist()
+
+
+def test_fetch_latest_bars_detects_adjustments():
+    cached = daily_bars("2026-01-05", 5)
+    for column in ("Dividends", "Stock Splits"):
+        latest = daily_bars("2026-01-05", 7)
+        latest["Dividends"] = 0.0
+        latest["Stock Splits"] = 0.0
+        latest.loc[latest.index[-1], column] = 4.0
+        assert fetch_latest_bars(FakeTicker(latest), cached) is None
+
+    # A dividend on a bar already cached was already adjusted for
+    latest = daily_bars("2026-01-05", 7)
+    latest["Dividends"] = 0.0
+    latest["Stock Splits"] = 0.0
+    latest.loc[latest.index[4], "Dividends"] = 0.5
+    assert fetch_latest_bars(FakeTicker(latest), cached) is not None
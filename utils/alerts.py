@@ -0,0 +1,342 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+from utils.cache import ttl_cache
+from utils.file_lock import process_lock
+from utils.indicators import compute_rsi, compute_macd
+from utils.sentiment_analysis import fetch_news_sentiment
+from utils.stock_data import fetch_closes
+from utils.warmup import RateLimiter, NEWSAPI_CALLS_PER_SECOND, NEWSAPI_RATE_PATH
+
+# Local storage of the watchlist and rules, of the last evaluated bar per ticker, and of fired alerts
+ALERTS_PATH = "alerts.json"
+ALERTS_STATE_PATH = "alerts_state.json"
+ALERTS_LOG_PATH = "alerts.log"
+ALERTS_SCHEDULER_LOCK_PATH = "alerts_scheduler.lock"
+
+# Indicators a rule can refer to, either as its subject or as the value it is compared with
+INDICATORS = ["close", "sma_20", "sma_50", "rsi", "macd", "signal", "histogram", "sentiment"]
+CONDITIONS = ["above", "below", "crosses_above", "crosses_below"]
+
+# Seconds a news sentiment score is reused, as for the sentiment panels of a search
+SENTIMENT_TTL = 3600
+
+_newsapi_limiter = RateLimiter(NEWSAPI_CALLS_PER_SECOND, NEWSAPI_RATE_PATH)
+
+
+def load_alerts(path=ALERTS_PATH):
+    """
+    Load the watchlist and the alert rules.
+
+    The file holds {"watchlist": ["AAPL", ...], "rules": [{"id": ..., "indicator": ..., "condition": ..., "value": ...}]}.
+    A rule may also list the "tickers" it applies to, otherwise it applies to the whole watchlist.
+    """
+    if not os.path.exists(path):
+        return {"watchlist": [], "rules": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_alerts(alerts, path=ALERTS_PATH):
+    """
+    Save the watchlist and the alert rules.
+    """
+    with open(path, "w") as f:
+        json.dump(alerts, f, indent=2)
+
+
+def add_rule(rule, path=ALERTS_PATH):
+    """
+    Validate an alert rule and add it to the stored rules.
+
+    Args:
+        rule (dict): The rule, e.g. {"id": "rsi-overbought", "indicator": "rsi", "condition": "crosses_above", "value": 70}.
+            The value is either a number or the name of another indicator, e.g. "signal".
+        path (str): Path of the alerts file.
+
+    Returns:
+        dict: The stored rule.
+    """
+    if rule.get("indicator") not in INDICATORS:
+        raise ValueError(f"Unknown indicator '{rule.get('indicator')}', expected one of {INDICATORS}.")
+    if rule.get("condition") not in CONDITIONS:
+        raise ValueError(f"Unknown condition '{rule.get('condition')}', expected one of {CONDITIONS}.")
+    value = rule.get("value")
+    if not isinstance(value, (int, float)) and value not in INDICATORS:
+        raise ValueError(f"The value of a rule must be a number or one of {INDICATORS}.")
+    if "sentiment" in (rule["indicator"], value) and rule["condition"].startswith("crosses"):
+        raise ValueError("Sentiment rules only support the 'above' and 'below' conditions.")
+
+    alerts = load_alerts(path)
+    rule = dict(rule, id=rule.get("id") or f"rule-{len(alerts['rules']) + 1}")
+    if rule.get("tickers"):
+        rule["tickers"] = [ticker.upper() for ticker in rule["tickers"]]
+    alerts["rules"] = [existing for existing in alerts["rules"] if existing["id"] != rule["id"]] + [rule]
+    save_alerts(alerts, path)
+    return rule
+
+
+def changed_tickers(close, state):
+    """
+    Find the tickers whose latest bar differs from the one seen at the previous run.
+
+    Args:
+        close (pandas.DataFrame): Closing prices with one column per ticker.
+        state (dict): {ticker: [date, close]} of the previous run, updated in place.
+
+    Returns:
+        list: The tickers whose data changed.
+    """
+    latest_close = close.ffill().iloc[-1]
+    latest_date = close.notna().iloc[::-1].idxmax()
+
+    changed = []
+    for ticker in close.columns:
+        if pd.isna(latest_close[ticker]):
+            continue
+        bar = [str(latest_date[ticker])[:10], float(latest_close[ticker])]
+        if state.get(ticker) != bar:
+            state[ticker] = bar
+            changed.append(ticker)
+    return changed
+
+
+def compute_indicators(close):
+    """
+    Compute every rule indicator for all tickers at once, at the latest two bars.
+
+    Args:
+        close (pandas.DataFrame): Closing prices with one column per ticker.
+
+    Returns:
+        dict: Indicator name to a DataFrame holding the latest two bars of each ticker.
+    """
+    close = close.ffill()
+    _, _, macd, signal_line = compute_macd(close)
+
+    # Rolling indicators only need the bars of their window before the latest two
+    return {
+        "close": close.tail(2),
+        "sma_20": close.tail(21).rolling(window=20).mean().tail(2),
+        "sma_50": close.tail(51).rolling(window=50).mean().tail(2),
+        "rsi": compute_rsi(close.tail(16)).tail(2),
+        "macd": macd.tail(2),
+        "signal": signal_line.tail(2),
+        "histogram": (macd - signal_line).tail(2),
+    }
+
+
+@ttl_cache(SENTIMENT_TTL)
+def news_sentiment_score(ticker):
+    """
+    Average compound sentiment score of last week's news for a ticker, or None if the news could not be retrieved.
+    """
+    df, _ = fetch_news_sentiment(ticker)
+    return df["compound"].mean() if df is not None else None
+
+
+def average_sentiment(tickers):
+    """
+    Average compound sentiment score of last week's news for each ticker.
+
+    Scores are cached, and the NewsAPI requests for the others are spaced out to stay within its rate limit.
+
+    Returns:
+        pandas.Series: The score per ticker, NaN when no news could be retrieved.
+    """
+    scores = {}
+    for ticker in tickers:
+        try:
+            if not news_sentiment_score.is_cached(ticker):
+                _newsapi_limiter.wait()
+            score = news_sentiment_score(ticker)
+            scores[ticker] = score if score is not None else float("nan")
+        except Exception as e:
+            print(f"Error fetching news sentiment for ticker {ticker}: {e}")
+            scores[ticker] = float("nan")
+    return pd.Series(scores, dtype=float)
+
+
+def evaluate_rule(rule, indicators, tickers):
+    """
+    Evaluate one rule over the latest two bars of all the given tickers at once.
+
+    Returns:
+        pandas.Series: The latest value of the rule indicator for the tickers where the rule fired.
+    """
+    def values(name):
+        # Latest and previous values of an indicator (or of a constant) for the tickers
+        if not isinstance(name, str):
+            return name, name
+        frame = indicators[name]
+        if isinstance(frame, pd.Series):
+            return frame.reindex(tickers), None
+        frame = frame.reindex(columns=tickers)
+        return frame.iloc[-1], frame.iloc[-2]
+
+    current, previous = values(rule["indicator"])
+    current_value, previous_value = values(rule["value"])
+
+    condition = rule["condition"]
+    if condition == "above":
+        fired = current > current_value
+    elif condition == "below":
+        fired = current < current_value
+    elif condition == "crosses_above":
+        fired = (previous <= previous_value) & (current > current_value)
+    else:
+        fired = (previous >= previous_value) & (current < current_value)
+
+    return current[fired.fillna(False).astype(bool)]
+
+
+def load_state(state_path=ALERTS_STATE_PATH):
+    """
+    Load the latest bar seen per ticker and the alerts already fired on those bars.
+
+    The file holds {"bars": {ticker: [date, close]}, "fired": [[rule id, ticker, date], ...]}.
+    Files written before fired alerts were tracked only hold the bars.
+    """
+    if not os.path.exists(state_path):
+        return {"bars": {}, "fired": []}
+    with open(state_path) as f:
+        state = json.load(f)
+    if "bars" not in state:
+        state = {"bars": state, "fired": []}
+    return state
+
+
+def run_alerts(path=ALERTS_PATH, state_path=ALERTS_STATE_PATH, sink=None):
+    """
+    Evaluate all the rules over the watchlist and deliver the alerts that fired.
+
+    Only the tickers whose latest bar changed since the previous run are evaluated, and a rule
+    fires at most once per ticker and bar: the latest bar is updated during the day, so a crossing
+    would otherwise be delivered again at every run until the next bar.
+
+    Args:
+        path (str): Path of the alerts file.
+        state_path (str): Path of the file keeping the latest bar seen per ticker and the alerts fired on it.
+        sink (callable): Function receiving the list of fired alerts (default writes them to `ALERTS_LOG_PATH`).
+
+    Returns:
+        list: The fired alerts.
+    """
+    alerts = load_alerts(path)
+    rules = alerts["rules"]
+    watchlist = sorted({ticker.upper() for ticker in alerts["watchlist"]} |
+                       {ticker for rule in rules for ticker in rule.get("tickers", [])})
+    if not rules or not watchlist:
+        return []
+
+    state = load_state(state_path)
+    bars = state["bars"]
+
+    close = fetch_closes(watchlist)
+    changed = changed_tickers(close, bars)
+    if not changed:
+        return []
+    changed_set = set(changed)
+
+    # Only the alerts fired on the latest bar of each ticker can fire again
+    already_fired = {
+        (rule_id, ticker, day) for rule_id, ticker, day in state["fired"]
+        if ticker in bars and bars[ticker][0] == day
+    }
+
+    indicators = compute_indicators(close[changed])
+
+    # News sentiment is only fetched for the tickers of the rules that use it
+    sentiment_tickers = {
+        ticker
+        for rule in rules if "sentiment" in (rule["indicator"], rule["value"])
+        for ticker in rule.get("tickers") or changed
+        if ticker in changed_set
+    }
+    if sentiment_tickers:
+        indicators["sentiment"] = average_sentiment(sorted(sentiment_tickers))
+
+    fired_at = datetime.now().isoformat(timespec="seconds")
+    fired_alerts = []
+    for rule in rules:
+        tickers = [ticker for ticker in rule.get("tickers") or changed if ticker in changed_set]
+        if not tickers:
+            continue
+        for ticker, indicator_value in evaluate_rule(rule, indicators, tickers).items():
+            key = (rule["id"], ticker, bars[ticker][0])
+            if key in already_fired:
+                continue
+            already_fired.add(key)
+            fired_alerts.append({
+                "rule": rule["id"],
+                "ticker": ticker,
+                "indicator": rule["indicator"],
+                "condition": rule["condition"],
+                "value": rule["value"],
+                "indicator_value": float(indicator_value),
+                "date": bars[ticker][0],
+                "fired_at": fired_at
+            })
+
+    if fired_alerts:
+        (sink or file_sink(ALERTS_LOG_PATH))(fired_alerts)
+
+    with open(state_path, "w") as f:
+        json.dump({"bars": bars, "fired": sorted(already_fired)}, f)
+
+    return fired_alerts
+
+
+def file_sink(path):
+    """
+    Create a sink appending the alerts to a local file, one JSON object per line.
+    """
+    def send(fired_alerts):
+        with open(path, "a") as f:
+            for alert in fired_alerts:
+                f.write(json.dumps(alert) + "\n")
+    return send
+
+
+def webhook_sink(url, timeout=10):
+    """
+    Create a sink posting the alerts as JSON to a webhook URL.
+    """
+    def send(fired_alerts):
+        response = requests.post(url, json={"alerts": fired_alerts}, timeout=timeout)
+        if response.status_code >= 400:
+            print(f"Error delivering {len(fired_alerts)} alerts to webhook: status code {response.status_code}")
+    return send
+
+
+def start_alert_scheduler(interval_seconds=3600, sink=None, lock_path=ALERTS_SCHEDULER_LOCK_PATH):
+    """
+    Run `run_alerts` every `interval_seconds` in a background thread.
+
+    Every worker process may call this: a file lock makes a single process run the alerts,
+    and another one takes over if that process exits.
+
+    Returns:
+        threading.Thread: The scheduler thread.
+    """
+    is_scheduler = process_lock(lock_path)
+
+    def loop():
+        while True:
+            if is_scheduler():
+                try:
+                    fired_alerts = run_alerts(sink=sink)
+                    print(f"Alert run finished, {len(fired_alerts)} alerts fired.")
+                except Exception as e:
+                    print(f"Error running alerts: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,80 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+# Maximum number of results kept across all cached functions, the least recently used are evicted first
+CACHE_MAX_ENTRIES = 2000
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def _is_error(value):
+    """
+    Whether a result reports a failure, following the conventions of the utils functions
+    (None, a dict with an "error" key, or a tuple starting with such a dict).
+    """
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return value is None or (isinstance(value, dict) and ("error" in value or "Error" in value))
+
+
+def ttl_cache(ttl):
+    """
+    Cache the results of a function for `ttl` seconds, keyed by its arguments.
+
+    Failed results are not cached so that the next call tries again.
+
+    Args:
+        ttl (int): Number of seconds a result stays valid.
+    """
+    def decorator(func):
+        def make_key(args, kwargs):
+            return (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+
+        def store(key, value, now):
+            if not _is_error(value):
+                with _lock:
+                    _entries[key] = (now + ttl, value)
+                    _entries.move_to_end(key)
+                    while len(_entries) > CACHE_MAX_ENTRIES:
+                        _entries.popitem(last=False)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            now = time.time()
+
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None and entry[0] > now:
+                    _entries.move_to_end(key)
+                    return entry[1]
+
+            value = func(*args, **kwargs)
+            store(key, value, now)
+            return value
+
+        def is_cached(*args, **kwargs):
+            # Whether a valid result is cached for these arguments, without calling the function
+            return expires_in(*args, **kwargs) > 0
+
+        def expires_in(*args, **kwargs):
+            # Seconds until the cached result for these arguments expires, 0 if none is cached
+            with _lock:
+                entry = _entries.get(make_key(args, kwargs))
+            return max(entry[0] - time.time(), 0) if entry is not None else 0
+
+        def refresh(*args, **kwargs):
+            # Call the function and cache its result, even if a valid one is already cached
+            now = time.time()
+            value = func(*args, **kwargs)
+            store(make_key(args, kwargs), value, now)
+            return value
+
+        wrapper.is_cached = is_cached
+        wrapper.expires_in = expires_in
+        wrapper.refresh = refresh
+        return wrapper
+    return decorator
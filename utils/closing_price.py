@@ -1,15 +1,20 @@
 import plotly.graph_objects as go
 from utils.stock_data import get_stock_data
+from utils.downsampling import downsample_frame, slice_to_range
+from utils.panel_cache import render_panel
 
-def plot_closing_prices(ticker):
+def plot_closing_prices(ticker, max_points=None, x_range=None, as_html=False):
     """
     Fetch and plot the closing price data for a given stock ticker.
 
     Args:
         ticker (str): Stock ticker symbol.
+        max_points (int): Maximum number of points to plot, or None to plot every point.
+        x_range (tuple): Optional (start, end) dates restricting the plotted range.
+        as_html (bool): Whether to return the HTML of the figure, served from the panel cache, instead of the figure.
 
     Returns:
-        plotly.graph_objects.Figure: A Plotly figure object for the closing prices.
+        plotly.graph_objects.Figure: A Plotly figure object (or its HTML) for the closing prices.
         dict: A summary of the data, including the latest closing price.
     """
     try:
@@ -19,25 +24,33 @@ def plot_closing_prices(ticker):
         if df is None or 'Close' not in df:
             return {"error": "Failed to fetch stock data or invalid data format."}, None
 
-        # Create the Plotly figure
-        fig = go.Figure()
-
-        # Plot the closing price
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['Close'],
-            mode='lines',
-            name='Closing Price',
-            line=dict(color='blue')
-        ))
-
-        # Customize the layout
-        fig.update_layout(
-            title=f"{ticker.upper()} Closing Prices",
-            xaxis_title="Date",
-            yaxis_title="Price (USD)",
-            xaxis_rangeslider_visible=True
-        )
+        # Only plot the requested range, downsampled to what the viewport can display
+        plot_df = downsample_frame(slice_to_range(df, x_range), 'Close', max_points)
+
+        def build_figure():
+            # Create the Plotly figure
+            fig = go.Figure()
+
+            # Plot the closing price
+            fig.add_trace(go.Scatter(
+                x=plot_df.index,
+                y=plot_df['Close'],
+                mode='lines',
+                name='Closing Price',
+                line=dict(color='blue')
+            ))
+
+            # Customize the layout
+            fig.update_layout(
+                title=f"{ticker.upper()} Closing Prices",
+                xaxis_title="Date",
+                yaxis_title="Price (USD)",
+                xaxis_rangeslider_visible=True
+            )
+            return fig
+
+        # Serialized panels are cached, the figure is only built when its data changed
+        fig = render_panel("closing_prices", ticker, (max_points, x_range), plot_df, build_figure) if as_html else build_figure()
 
         # Get the latest closing price
         latest_close = df['Close'].iloc[-1]
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+
+def points_for_width(width, points_per_pixel=1, min_points=200, max_points=5000):
+    """
+    Convert the pixel width of a chart viewport into a maximum number of points per trace.
+
+    Args:
+        width (float): Width of the chart viewport in pixels.
+        points_per_pixel (float): Number of points to keep for each horizontal pixel (default is 1).
+        min_points (int): Lower bound on the number of points (default is 200).
+        max_points (int): Upper bound on the number of points (default is 5000).
+
+    Returns:
+        int: The maximum number of points per trace, or None if no width was given.
+    """
+    if not width:
+        return None
+    return int(min(max(width * points_per_pixel, min_points), max_points))
+
+
+def _fill_gaps(y):
+    """
+    Forward fill NaNs (e.g. the warm-up period of a rolling window), then backward fill the leading ones.
+    """
+    missing = np.isnan(y)
+    if not missing.any():
+        return y
+    if missing.all():
+        return np.zeros_like(y)
+
+    positions = np.where(~missing, np.arange(len(y)), 0)
+    np.maximum.accumulate(positions, out=positions)
+    filled = y[positions]
+    first_valid = np.argmax(~missing)
+    filled[:first_valid] = y[first_valid]
+    return filled
+
+
+def lttb_indices(values, threshold):
+    """
+    Select the points to keep with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are split into
+    `threshold - 2` buckets and, in each bucket, the point forming the largest triangle
+    with the previously selected point and the average of the next bucket is kept,
+    which preserves peaks and troughs of the series.
+
+    Args:
+        values (array-like): Y values of the series, assumed evenly spaced on the x axis.
+        threshold (int): Maximum number of points to keep.
+
+    Returns:
+        numpy.ndarray: Sorted integer positions of the points to keep.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if threshold is None or threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = _fill_gaps(y)
+    x = np.arange(n, dtype=float)
+
+    # Bucket boundaries for the points between the first and the last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average point of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Triangle areas (times two) formed with the previously selected point
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def downsample_frame(df, column, max_points):
+    """
+    Reduce a DataFrame to at most `max_points` rows, keeping the shape of one of its columns.
+
+    All columns are reduced with the same rows so that the traces of a chart stay aligned.
+
+    Args:
+        df (pandas.DataFrame): Data to plot.
+        column (str): Column whose shape drives the selection of rows.
+        max_points (int): Maximum number of rows to keep, or None to keep all of them.
+
+    Returns:
+        pandas.DataFrame: The downsampled DataFrame.
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+    return df.iloc[lttb_indices(df[column].to_numpy(), max_points)]
+
+
+def slice_to_range(df, x_range):
+    """
+    Keep only the rows of a DataFrame whose date index falls inside `x_range`, and the row on each side of it.
+
+    The rows around the range let the lines of a zoomed chart reach its edges, and a range without
+    any row (e.g. a weekend) still gets the rows around it.
+
+    Args:
+        df (pandas.DataFrame): Data indexed by sorted dates.
+        x_range (tuple): (start, end) dates as strings or dates; either bound may be empty.
+
+    Returns:
+        pandas.DataFrame: The rows inside the range and around it.
+    """
+    if not x_range or not any(x_range):
+        return df
+
+    start, end = x_range
+    dates = pd.to_datetime(df.index)
+    first = dates.searchsorted(pd.to_datetime(start), side="left") - 1 if start else 0
+    last = dates.searchsorted(pd.to_datetime(end), side="right") + 1 if end else len(df)
+    return df.iloc[max(first, 0):last]
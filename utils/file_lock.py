@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the app runs as a single process
+    fcntl = None
+
+
+@contextmanager
+def locked_file(path):
+    """
+    Hold an exclusive lock, shared by all the processes of the app, while reading and rewriting `path`.
+
+    The lock is taken on a separate `<path>.lock` file so that `path` itself can be replaced atomically.
+    """
+    with open(path + ".lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def process_lock(path):
+    """
+    Create a check electing a single process among the workers of the app, e.g. to run a background job.
+
+    The returned function tries to take a non-blocking lock on `path` and keeps it for the life of the
+    process. Calling it at every run of the job lets another process take over when the holder exits.
+
+    Returns:
+        callable: Function returning whether the current process holds the lock.
+    """
+    lock_file = open(path, "w")
+
+    def is_holder():
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    return is_holder
@@ -0,0 +1,219 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+
+# Backend used when none is requested
+DEFAULT_FORECASTER = os.getenv("FORECAST_BACKEND", "prophet")
+
+# Smoothing parameters searched when fitting Holt-Winters, all combinations are fitted at once
+HOLT_WINTERS_GRID = {
+    "alpha": [0.1, 0.3, 0.5, 0.7, 0.9],
+    "beta": [0.01, 0.05, 0.1, 0.2],
+    "gamma": [0.05, 0.1, 0.3],
+}
+# Trading days in a week, the season length of Holt-Winters
+HOLT_WINTERS_SEASON = 5
+# Number of yearly Fourier terms of the linear trend model
+YEARLY_FOURIER_TERMS = 3
+
+
+def _future_dates(history, periods):
+    """
+    Trading days following the history over the next `periods` calendar days.
+    """
+    last_date = history['ds'].iloc[-1]
+    return pd.bdate_range(start=last_date + pd.Timedelta(days=1), end=last_date + pd.Timedelta(days=periods))
+
+
+def _with_interval(dates, yhat, spread):
+    """
+    Build a forecast DataFrame with a 95% interval of `spread` standard deviations around `yhat`.
+    """
+    return pd.DataFrame({
+        'ds': dates,
+        'yhat': yhat,
+        'yhat_lower': yhat - 1.96 * spread,
+        'yhat_upper': yhat + 1.96 * spread
+    })
+
+
+def fit_prophet(history, uncertainty_samples=1000):
+    """
+    Fit a Prophet model on a history with 'ds' and 'y' columns.
+    """
+    model = Prophet(uncertainty_samples=uncertainty_samples)
+    model.fit(history)
+    return model
+
+
+def fit_prophet_fast(history):
+    """
+    Fit a Prophet model without uncertainty sampling, which makes predicting much cheaper.
+    """
+    return fit_prophet(history, uncertainty_samples=0)
+
+
+def predict_prophet(model, history, periods):
+    """
+    Forecast the history and the next `periods` calendar days with a fitted Prophet model.
+    """
+    future = model.make_future_dataframe(periods=periods)
+    return model.predict(future)
+
+
+def fit_holt_winters(history):
+    """
+    Fit an additive Holt-Winters model with a weekly season, picking the smoothing parameters
+    with the lowest one-step-ahead squared error over `HOLT_WINTERS_GRID`.
+    """
+    y = history['y'].to_numpy(dtype=float)
+    m = HOLT_WINTERS_SEASON
+
+    # One row per combination of parameters, all updated together at each step
+    alpha, beta, gamma = (grid.ravel() for grid in np.meshgrid(*HOLT_WINTERS_GRID.values(), indexing='ij'))
+    level = np.full(alpha.shape, y[0])
+    trend = np.full(alpha.shape, (y[m] - y[0]) / m)
+    season = np.tile(y[:m] - y[:m].mean(), (len(alpha), 1))
+    errors = np.empty((len(y) - 1, len(alpha)))
+
+    for t in range(1, len(y)):
+        i = t % m
+        errors[t - 1] = y[t] - (level + trend + season[:, i])
+        previous_level = level
+        level = alpha * (y[t] - season[:, i]) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+        season[:, i] = gamma * (y[t] - level) + (1 - gamma) * season[:, i]
+
+    best = np.argmin((errors ** 2).sum(axis=0))
+    return {
+        'level': level[best],
+        'trend': trend[best],
+        'season': season[best],
+        'sigma': errors[:, best].std(),
+        'length': len(y)
+    }
+
+
+def predict_holt_winters(model, history, periods):
+    """
+    Forecast the next `periods` calendar days with a fitted Holt-Winters model.
+    """
+    dates = _future_dates(history, periods)
+    steps = np.arange(1, len(dates) + 1)
+    season = model['season'][(model['length'] + steps - 1) % HOLT_WINTERS_SEASON]
+    yhat = model['level'] + steps * model['trend'] + season
+    return _with_interval(dates, yhat, model['sigma'] * np.sqrt(steps))
+
+
+def _trend_features(dates, start):
+    """
+    Design matrix of an intercept, a linear trend in years and yearly Fourier terms.
+    """
+    years = (pd.DatetimeIndex(dates) - start).days.to_numpy() / 365.25
+    columns = [np.ones_like(years), years]
+    for k in range(1, YEARLY_FOURIER_TERMS + 1):
+        columns += [np.sin(2 * np.pi * k * years), np.cos(2 * np.pi * k * years)]
+    return np.column_stack(columns)
+
+
+def fit_linear_seasonal(history):
+    """
+    Fit a linear trend plus yearly seasonality by least squares.
+    """
+    start = pd.Timestamp(history['ds'].iloc[0])
+    features = _trend_features(history['ds'], start)
+    y = history['y'].to_numpy(dtype=float)
+    coefficients, *_ = np.linalg.lstsq(features, y, rcond=None)
+    return {
+        'start': start,
+        'coefficients': coefficients,
+        'sigma': (y - features @ coefficients).std()
+    }
+
+
+def predict_linear_seasonal(model, history, periods):
+    """
+    Forecast the next `periods` calendar days with a fitted linear trend and seasonality model.
+    """
+    dates = _future_dates(history, periods)
+    yhat = _trend_features(dates, model['start']) @ model['coefficients']
+    return _with_interval(dates, yhat, model['sigma'])
+
+
+# Forecasting backends: name -> (label, fit function, predict function)
+FORECASTERS = {
+    "prophet": ("Prophet", fit_prophet, predict_prophet),
+    "prophet_fast": ("Prophet, no uncertainty sampling", fit_prophet_fast, predict_prophet),
+    "holt_winters": ("Holt-Winters", fit_holt_winters, predict_holt_winters),
+    "linear_seasonal": ("Linear trend and seasonality", fit_linear_seasonal, predict_linear_seasonal),
+}
+
+
+def run_forecast(history, periods, backend=DEFAULT_FORECASTER):
+    """
+    Fit a forecasting backend on a history and forecast the next `periods` calendar days.
+
+    Args:
+        history (pandas.DataFrame): Prices with 'ds' (date) and 'y' (price) columns.
+        periods (int): Number of calendar days to forecast.
+        backend (str): Name of the backend, one of `FORECASTERS`.
+
+    Returns:
+        pandas.DataFrame: The forecast with 'ds' and 'yhat' columns, and 'yhat_lower' and 'yhat_upper'
+            when the backend estimates its uncertainty. Prophet also covers the history.
+        dict: Fit and predict latency in seconds.
+    """
+    if backend not in FORECASTERS:
+        raise ValueError(f"Unknown forecasting backend '{backend}', expected one of {list(FORECASTERS)}.")
+    _, fit, predict = FORECASTERS[backend]
+
+    start = time.perf_counter()
+    model = fit(history)
+    fitted = time.perf_counter()
+    forecast = predict(model, history, periods)
+    predicted = time.perf_counter()
+
+    return forecast, {
+        "fit_seconds": fitted - start,
+        "predict_seconds": predicted - fitted
+    }
+
+
+def backtest_forecasters(history, horizon=60, backends=None):
+    """
+    Compare forecasting backends on the last `horizon` calendar days of a history.
+
+    Each backend is fitted on the history before the holdout period and its forecast is compared
+    with the actual prices of the holdout period.
+
+    Args:
+        history (pandas.DataFrame): Prices with 'ds' (date) and 'y' (price) columns.
+        horizon (int): Length of the holdout period in calendar days (default is 60).
+        backends (list): Names of the backends to compare (default is all of them).
+
+    Returns:
+        dict: Per backend, the fit and predict latency, the mean absolute percentage error over the
+            holdout period and whether the up/down direction at its end was predicted correctly.
+    """
+    history = history.assign(ds=pd.to_datetime(history['ds']))
+    cutoff = history['ds'].iloc[-1] - pd.Timedelta(days=horizon)
+    train = history[history['ds'] <= cutoff]
+    holdout = history[history['ds'] > cutoff]
+    last_train_price = train['y'].iloc[-1]
+
+    results = {}
+    for backend in backends or FORECASTERS:
+        forecast, timings = run_forecast(train, horizon, backend)
+        compared = holdout.merge(forecast[['ds', 'yhat']], on='ds')
+        error = np.abs(compared['yhat'] - compared['y']) / compared['y']
+        actual_up = holdout['y'].iloc[-1] > last_train_price
+        predicted_up = forecast['yhat'].iloc[-1] > last_train_price
+        results[backend] = {
+            **timings,
+            "mape": float(error.mean()),
+            "direction_correct": bool(actual_up == predicted_up)
+        }
+    return results
@@ -8,14 +8,55 @@ sys.path.append(project_path)
 import pandas as pd
 import plotly.graph_objects as go
 from utils.stock_data import get_stock_data  # Import fetch_stock_data from the same module
+from utils.downsampling import downsample_frame, slice_to_range
+from utils.panel_cache import render_panel
 
-def calculate_smas_and_opinion(ticker, plot=False):
+def compute_rsi(close, window_length=14):
+    """
+    Compute the Relative Strength Index (RSI) of closing prices.
+
+    Args:
+        close (pandas.Series or pandas.DataFrame): Closing prices, one column per ticker for a DataFrame.
+        window_length (int): Period for calculating RSI (default is 14).
+
+    Returns:
+        pandas.Series or pandas.DataFrame: The RSI, with the same shape as `close`.
+    """
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window_length).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window_length).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+def compute_macd(close, short_window=12, long_window=26, signal_window=9):
+    """
+    Compute the short and long EMAs, the MACD and its Signal Line from closing prices.
+
+    Args:
+        close (pandas.Series or pandas.DataFrame): Closing prices, one column per ticker for a DataFrame.
+        short_window (int): EMA short window (default is 12).
+        long_window (int): EMA long window (default is 26).
+        signal_window (int): Signal line window (default is 9).
+
+    Returns:
+        tuple: The short EMA, long EMA, MACD and Signal Line, each with the same shape as `close`.
+    """
+    ema_short = close.ewm(span=short_window, adjust=False).mean()
+    ema_long = close.ewm(span=long_window, adjust=False).mean()
+    macd = ema_short - ema_long
+    signal_line = macd.ewm(span=signal_window, adjust=False).mean()
+    return ema_short, ema_long, macd, signal_line
+
+def calculate_smas_and_opinion(ticker, plot=False, max_points=None, x_range=None, as_html=False):
     """
     Calculate SMAs (20, 50) and provide an opinion based on the SMA strategy.
 
     Args:
         ticker (str): Stock ticker symbol.
         plot (bool): Whether to plot the SMAs and closing price using Plotly.
+        max_points (int): Maximum number of points per trace, or None to plot every point.
+        x_range (tuple): Optional (start, end) dates restricting the plotted range.
+        as_html (bool): Whether to return the HTML of the figure, served from the panel cache, instead of the figure.
 
     Returns:
         dict: A dictionary containing the last row of data, calculated SMAs, and an opinion.
@@ -53,42 +94,50 @@ def calculate_smas_and_opinion(ticker, plot=False):
         # Create the Plotly graph if requested
         fig = None
         if plot:
-            fig = go.Figure()
-
-            # Plot the closing price
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['Close'],
-                mode='lines',
-                name='Closing Price',
-                line=dict(color='blue')
-            ))
-
-            # Plot SMA 20
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['SMA_20'],
-                mode='lines',
-                name='SMA 20',
-                line=dict(dash='dot', color='green')
-            ))
-
-            # Plot SMA 50
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['SMA_50'],
-                mode='lines',
-                name='SMA 50',
-                line=dict(dash='dot', color='red')
-            ))
-
-            # Customize the layout
-            fig.update_layout(
-                title=f"{ticker.upper()} Closing Price and SMAs (20, 50)",
-                xaxis_title="Date",
-                yaxis_title="Price (USD)",
-                xaxis_rangeslider_visible=True
-            )
+            # Only plot the requested range, downsampled to what the viewport can display;
+            # the opinion above is always based on the full data
+            plot_df = downsample_frame(slice_to_range(df, x_range), 'Close', max_points)
+
+            def build_figure():
+                fig = go.Figure()
+
+                # Plot the closing price
+                fig.add_trace(go.Scatter(
+                    x=plot_df.index,
+                    y=plot_df['Close'],
+                    mode='lines',
+                    name='Closing Price',
+                    line=dict(color='blue')
+                ))
+
+                # Plot SMA 20
+                fig.add_trace(go.Scatter(
+                    x=plot_df.index,
+                    y=plot_df['SMA_20'],
+                    mode='lines',
+                    name='SMA 20',
+                    line=dict(dash='dot', color='green')
+                ))
+
+                # Plot SMA 50
+                fig.add_trace(go.Scatter(
+                    x=plot_df.index,
+                    y=plot_df['SMA_50'],
+                    mode='lines',
+                    name='SMA 50',
+                    line=dict(dash='dot', color='red')
+                ))
+
+                # Customize the layout
+                fig.update_layout(
+                    title=f"{ticker.upper()} Closing Price and SMAs (20, 50)",
+                    xaxis_title="Date",
+                    yaxis_title="Price (USD)",
+                    xaxis_rangeslider_visible=True
+                )
+                return fig
+
+            fig = render_panel("sma", ticker, (max_points, x_range), plot_df[['Close', 'SMA_20', 'SMA_50']], build_figure) if as_html else build_figure()
 
         # Return the last row data and opinion
         return {
@@ -102,7 +151,7 @@ def calculate_smas_and_opinion(ticker, plot=False):
 
 
 
-def calculate_and_plot_rsi(ticker, window_length=14, plot=True):
+def calculate_and_plot_rsi(ticker, window_length=14, plot=True, max_points=None, x_range=None, as_html=False):
     """
     Calculate the Relative Strength Index (RSI), plot it, and provide an opinion.
 
@@ -110,6 +159,9 @@ def calculate_and_plot_rsi(ticker, window_length=14, plot=True):
         ticker (str): Stock ticker symbol.
         window_length (int): Period for calculating RSI (default is 14).
         plot (bool): Whether to plot the RSI using Plotly.
+        max_points (int): Maximum number of points per trace, or None to plot every point.
+        x_range (tuple): Optional (start, end) dates restricting the plotted range.
+        as_html (bool): Whether to return the HTML of the figure, served from the panel cache, instead of the figure.
 
     Returns:
         dict: A dictionary containing the RSI values, last RSI value, and opinion.
@@ -123,12 +175,7 @@ def calculate_and_plot_rsi(ticker, window_length=14, plot=True):
             return {"error": "Failed to fetch stock data or invalid data format."}
 
         # Calculate RSI
-        close = df['Close']
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=window_length).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window_length).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
+        df['RSI'] = compute_rsi(df['Close'], window_length)
 
         # Extract the last row with the RSI value
         last_row = df[['Close', 'RSI']].tail(1)
@@ -146,47 +193,56 @@ def calculate_and_plot_rsi(ticker, window_length=14, plot=True):
         # Create Plotly figure if requested
         fig = None
         if plot:
-            fig = go.Figure()
-
-            # Plot the RSI line
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['RSI'],
-                mode='lines',
-                name='RSI',
-                line=dict(color='blue')
-            ))
-
-            # Add overbought level (70)
-            fig.add_shape(
-                type='line',
-                x0=df.index[0],
-                y0=70,
-                x1=df.index[-1],
-                y1=70,
-                line=dict(color='red', dash='dash'),
-                name='Overbought (70)'
-            )
-
-            # Add oversold level (30)
-            fig.add_shape(
-                type='line',
-                x0=df.index[0],
-                y0=30,
-                x1=df.index[-1],
-                y1=30,
-                line=dict(color='green', dash='dash'),
-                name='Oversold (30)'
-            )
-
-            # Customize layout
-            fig.update_layout(
-                title=f"{ticker.upper()} Relative Strength Index (RSI)",
-                xaxis_title="Date",
-                yaxis_title="RSI",
-                xaxis_rangeslider_visible=True,
-                yaxis=dict(range=[0, 100])  # RSI ranges from 0 to 100
-            )
+            # Plot only the requested range, reduced to the viewport resolution
+            plot_df = downsample_frame(slice_to_range(df, x_range), 'RSI', max_points)
+
+            def build_figure():
+                fig = go.Figure()
+
+                # Plot the RSI line
+                fig.add_trace(go.Scatter(
+                    x=plot_df.index,
+                    y=plot_df['RSI'],
+                    mode='lines',
+                    name='RSI',
+                    line=dict(color='blue')
+                ))
+
+                # Add overbought level (70)
+                fig.add_shape(
+                    type='line',
+                    xref='paper',
+                    x0=0,
+                    y0=70,
+                    x1=1,
+                    y1=70,
+                    line=dict(color='red', dash='dash'),
+                    name='Overbought (70)'
+                )
+
+                # Add oversold level (30)
+                fig.add_shape(
+                    type='line',
+                    xref='paper',
+                    x0=0,
+                    y0=30,
+                    x1=1,
+                    y1=30,
+                    line=dict(color='green', dash='dash'),
+                    name='Oversold (30)'
+                )
+
+                # Customize layout
+                fig.update_layout(
+                    title=f"{ticker.upper()} Relative Strength Index (RSI)",
+                    xaxis_title="Date",
+                    yaxis_title="RSI",
+                    xaxis_rangeslider_visible=True,
+                    yaxis=dict(range=[0, 100])  # RSI ranges from 0 to 100
+                )
+                return fig
+
+            fig = render_panel("rsi", ticker, (window_length, max_points, x_range), plot_df[['RSI']], build_figure) if as_html else build_figure()
 
         # Return results and the plot
         return {
@@ -199,7 +255,7 @@ def calculate_and_plot_rsi(ticker, window_length=14, plot=True):
         return {"error": str(e)}
 
 
-def calculate_and_plot_macd(ticker, short_window=12, long_window=26, signal_window=9, plot=True):
+def calculate_and_plot_macd(ticker, short_window=12, long_window=26, signal_window=9, plot=True, max_points=None, x_range=None, as_html=False):
     """
     Calculate the MACD, Signal Line, and Histogram, and provide an opinion.
 
@@ -209,6 +265,9 @@ def calculate_and_plot_macd(ticker, short_window=12, long_window=26, signal_wind
         long_window (int): EMA long window (default is 26).
         signal_window (int): Signal line window (default is 9).
         plot (bool): Whether to plot the MACD and Signal Line using Plotly.
+        max_points (int): Maximum number of points per trace, or None to plot every point.
+        x_range (tuple): Optional (start, end) dates restricting the plotted range.
+        as_html (bool): Whether to return the HTML of the figure, served from the panel cache, instead of the figure.
 
     Returns:
         dict: A dictionary containing the MACD values, Signal Line, and opinion.
@@ -222,10 +281,9 @@ def calculate_and_plot_macd(ticker, short_window=12, long_window=26, signal_wind
             return {"error": "Failed to fetch stock data or invalid data format."}
 
         # Calculate MACD and related values
-        df['EMA_12'] = df['Close'].ewm(span=short_window, adjust=False).mean()
-        df['EMA_26'] = df['Close'].ewm(span=long_window, adjust=False).mean()
-        df['MACD'] = df['EMA_12'] - df['EMA_26']
-        df['Signal_Line'] = df['MACD'].ewm(span=signal_window, adjust=False).mean()
+        df['EMA_12'], df['EMA_26'], df['MACD'], df['Signal_Line'] = compute_macd(
+            df['Close'], short_window, long_window, signal_window
+        )
         df['Histogram'] = df['MACD'] - df['Signal_Line']
 
         # Get the last row
@@ -249,41 +307,51 @@ def calculate_and_plot_macd(ticker, short_window=12, long_window=26, signal_wind
         # Create Plotly figure if requested
         fig = None
         if plot:
-            fig = go.Figure()
-
-            # Plot MACD
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['MACD'],
-                mode='lines',
-                name='MACD',
-                line=dict(color='blue')
-            ))
-
-            # Plot Signal Line
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['Signal_Line'],
-                mode='lines',
-                name='Signal Line',
-                line=dict(dash='dot', color='orange')
-            ))
-
-            # Plot Histogram
-            fig.add_trace(go.Bar(
-                x=df.index,
-                y=df['Histogram'],
-                name='Histogram',
-                marker_color='gray'
-            ))
-
-            # Customize the layout
-            fig.update_layout(
-                title=f"{ticker.upper()} MACD, Signal Line, and Histogram",
-                xaxis_title="Date",
-                yaxis_title="Value",
-                xaxis_rangeslider_visible=True
-            )
+            # Select the points from the histogram so its sign changes survive the reduction
+            plot_df = downsample_frame(slice_to_range(df, x_range), 'Histogram', max_points)
+
+            def build_figure():
+                fig = go.Figure()
+
+                # Plot MACD
+                fig.add_trace(go.Scatter(
+                    x=plot_df.index,
+                    y=plot_df['MACD'],
+                    mode='lines',
+                    name='MACD',
+                    line=dict(color='blue')
+                ))
+
+                # Plot Signal Line
+                fig.add_trace(go.Scatter(
+                    x=plot_df.index,
+                    y=plot_df['Signal_Line'],
+                    mode='lines',
+                    name='Signal Line',
+                    line=dict(dash='dot', color='orange')
+                ))
+
+                # Plot Histogram
+                fig.add_trace(go.Bar(
+                    x=plot_df.index,
+                    y=plot_df['Histogram'],
+                    name='Histogram',
+                    marker_color='gray'
+                ))
+
+                # Customize the layout
+                fig.update_layout(
+                    title=f"{ticker.upper()} MACD, Signal Line, and Histogram",
+                    xaxis_title="Date",
+                    yaxis_title="Value",
+                    xaxis_rangeslider_visible=True
+                )
+                return fig
+
+            fig = render_panel(
+                "macd", ticker, (short_window, long_window, signal_window, max_points, x_range),
+                plot_df[['MACD', 'Signal_Line', 'Histogram']], build_figure
+            ) if as_html else build_figure()
 
         # Return results and the plot
         return {
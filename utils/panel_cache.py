@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Total size of the cached panels, the least recently used are evicted first.
+# plotly.js is loaded once by the page, so a downsampled panel only weighs a few tens of KB.
+PANEL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_panels = OrderedDict()
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+def data_fingerprint(*data):
+    """
+    Hash the values and index of the Series and DataFrames a panel is built from.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for item in data:
+        digest.update(pd.util.hash_pandas_object(item, index=True).to_numpy().tobytes())
+        if isinstance(item, pd.DataFrame):
+            digest.update(",".join(map(str, item.columns)).encode())
+    return digest.hexdigest()
+
+
+def render_panel(panel, ticker, params, data, build_figure):
+    """
+    Return the HTML of a panel, building and serializing its figure only if the data changed.
+
+    Args:
+        panel (str): Type of panel, e.g. "sma".
+        ticker (str): Stock ticker symbol.
+        params (tuple): Parameters the figure depends on besides its data.
+        data (pandas.DataFrame or tuple): Data plotted by the panel, or a tuple of Series and DataFrames.
+        build_figure (callable): Function building the Plotly figure of the panel.
+
+    Returns:
+        str: The HTML of the panel.
+    """
+    global _total_bytes
+
+    key = (panel, ticker, params, data_fingerprint(*(data if isinstance(data, tuple) else (data,))))
+    with _lock:
+        html = _panels.get(key)
+        if html is not None:
+            _panels.move_to_end(key)
+            return html.decode()
+
+    html = build_figure().to_html(full_html=False, include_plotlyjs=False).encode()
+
+    with _lock:
+        if key not in _panels and len(html) <= PANEL_CACHE_MAX_BYTES:
+            _panels[key] = html
+            _total_bytes += len(html)
+            while _total_bytes > PANEL_CACHE_MAX_BYTES:
+                _, evicted = _panels.popitem(last=False)
+                _total_bytes -= len(evicted)
+    return html.decode()
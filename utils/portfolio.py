@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from utils.resampling import cached_history
+from utils.stock_data import fetch_closes
+
+# Trading days per year, used to annualize daily figures
+TRADING_DAYS = 252
+
+# Number of Monte Carlo paths simulated per NumPy batch
+SIMULATION_BATCH_SIZE = 10_000
+
+
+def get_returns_matrix(tickers, period="1y"):
+    """
+    Fetch the closing prices of several tickers and align their daily returns on common dates.
+
+    The prices already cached are reused, and the other tickers are downloaded together in batches.
+
+    Args:
+        tickers (list): Stock ticker symbols.
+        period (str): Period of data to fetch (default is "1y").
+
+    Returns:
+        pandas.DataFrame: Daily returns with one column per ticker, only on dates where every ticker traded.
+        list: The tickers whose data could not be fetched.
+    """
+    closes = {}
+    for ticker in tickers:
+        data = cached_history(ticker, period)
+        if data is not None and not data.empty:
+            # Dates without timezone, as returned by yf.download for daily bars
+            closes[ticker] = pd.Series(data["Close"].to_numpy(), index=data.index.tz_localize(None).normalize())
+
+    to_download = [ticker for ticker in tickers if ticker not in closes]
+    if to_download:
+        downloaded = fetch_closes(to_download, period=period)
+        for ticker in to_download:
+            if ticker in downloaded and downloaded[ticker].notna().any():
+                closes[ticker] = downloaded[ticker]
+
+    missing = [ticker for ticker in tickers if ticker not in closes]
+    prices = pd.DataFrame(closes).sort_index()
+
+    # Keep the common dates before computing the returns, so that no return spans a gap of one ticker
+    returns = prices.dropna().pct_change().dropna()
+    return returns, missing
+
+
+def _simulation_factor(covariance):
+    """
+    Matrix turning independent standard normal draws into draws with the given covariance.
+    """
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        # Covariance estimated from few dates or collinear assets is not positive definite
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def horizon_returns(returns, horizon=1):
+    """
+    Compounded returns over every window of `horizon` consecutive days of a daily return series.
+
+    Returns:
+        numpy.ndarray: The overlapping returns over the horizon, one per window.
+    """
+    returns = np.asarray(returns)
+    if horizon == 1:
+        return returns
+    growth = np.concatenate([[0.0], np.cumsum(np.log1p(returns))])
+    return np.expm1(growth[horizon:] - growth[:-horizon])
+
+
+def value_at_risk(returns, confidence=0.95):
+    """
+    Historical Value at Risk and Conditional Value at Risk (expected shortfall) of a return series.
+
+    Returns:
+        tuple: VaR and CVaR, both as positive losses.
+    """
+    losses = -np.asarray(returns)
+    var = np.quantile(losses, confidence)
+    return float(var), float(losses[losses >= var].mean())
+
+
+def monte_carlo_var(mean, covariance, weights, confidence=0.95, simulations=10_000, horizon=1, seed=None):
+    """
+    Monte Carlo Value at Risk and Conditional Value at Risk of a portfolio with normally distributed returns.
+
+    Args:
+        mean (numpy.ndarray): Mean daily return of each asset.
+        covariance (numpy.ndarray): Covariance matrix of the daily returns.
+        weights (numpy.ndarray): Portfolio weights.
+        confidence (float): Confidence level (default is 0.95).
+        simulations (int): Number of simulated paths (default is 10,000).
+        horizon (int): Horizon in trading days (default is 1).
+        seed (int): Optional seed of the random generator.
+
+    Returns:
+        tuple: VaR and CVaR over the horizon, both as positive losses.
+    """
+    rng = np.random.default_rng(seed)
+    factor = _simulation_factor(covariance * horizon)
+    drift = mean * horizon
+
+    # Project the factor on the weights once, so that each batch is a single matrix-vector product
+    loadings = factor.T @ weights
+    portfolio_drift = drift @ weights
+
+    returns = np.empty(simulations)
+    for start in range(0, simulations, SIMULATION_BATCH_SIZE):
+        size = min(SIMULATION_BATCH_SIZE, simulations - start)
+        draws = rng.standard_normal((size, len(weights)))
+        returns[start:start + size] = portfolio_drift + draws @ loadings
+
+    return value_at_risk(returns, confidence)
+
+
+def analyze_portfolio(holdings, benchmark="SPY", period="1y", confidence=0.95, simulations=10_000, horizon=1, seed=None):
+    """
+    Compute the risk metrics of a portfolio of stocks.
+
+    Args:
+        holdings (dict): Weight of each ticker, normalized to sum to 1.
+        benchmark (str): Ticker the beta is measured against (default is "SPY").
+        period (str): Period of history used (default is "1y").
+        confidence (float): Confidence level of the VaR and CVaR (default is 0.95).
+        simulations (int): Number of Monte Carlo paths (default is 10,000).
+        horizon (int): Horizon of the historical and Monte Carlo VaR/CVaR in trading days (default is 1).
+        seed (int): Optional seed of the Monte Carlo simulation.
+
+    Returns:
+        dict: The portfolio return series, volatility, beta, historical and Monte Carlo VaR/CVaR over the horizon,
+            and the contribution of each position to the portfolio volatility.
+    """
+    try:
+        tickers = [ticker.upper() for ticker in holdings]
+        weights = np.array([holdings[ticker] for ticker in holdings], dtype=float)
+        if weights.sum() == 0:
+            return {"error": "The weights of the holdings sum to zero."}
+        weights = weights / weights.sum()
+
+        returns, missing = get_returns_matrix(tickers + [benchmark.upper()], period=period)
+        if missing:
+            return {"error": f"Failed to fetch stock data for {', '.join(missing)}."}
+        if len(returns) < 2:
+            return {"error": "Not enough common trading days between the holdings."}
+
+        asset_returns = returns[tickers].to_numpy()
+        benchmark_returns = returns[benchmark.upper()].to_numpy()
+
+        # Portfolio returns and volatility
+        portfolio_returns = asset_returns @ weights
+        covariance = np.cov(asset_returns, rowvar=False).reshape(len(tickers), len(tickers))
+        portfolio_variance = weights @ covariance @ weights
+        daily_volatility = np.sqrt(portfolio_variance)
+
+        # Beta against the benchmark
+        beta = np.cov(portfolio_returns, benchmark_returns)[0, 1] / benchmark_returns.var(ddof=1)
+
+        # Contribution of each position to the portfolio volatility, summing to the volatility
+        contributions = weights * (covariance @ weights) / daily_volatility
+
+        # Historical figures over the same horizon as the simulated ones, from overlapping windows of returns
+        if len(portfolio_returns) <= horizon:
+            return {"error": f"Not enough common trading days for a {horizon}-day horizon."}
+        historical_var, historical_cvar = value_at_risk(horizon_returns(portfolio_returns, horizon), confidence)
+        mc_var, mc_cvar = monte_carlo_var(
+            asset_returns.mean(axis=0), covariance, weights,
+            confidence=confidence, simulations=simulations, horizon=horizon, seed=seed
+        )
+
+        return {
+            "returns": pd.Series(portfolio_returns, index=returns.index),
+            "daily_volatility": float(daily_volatility),
+            "annual_volatility": float(daily_volatility * np.sqrt(TRADING_DAYS)),
+            "beta": float(beta),
+            "horizon": horizon,
+            "historical_var": historical_var,
+            "historical_cvar": historical_cvar,
+            "monte_carlo_var": mc_var,
+            "monte_carlo_cvar": mc_cvar,
+            "risk_contributions": pd.DataFrame({
+                "weight": weights,
+                "volatility_contribution": contributions,
+                "share_of_risk": contributions / daily_volatility
+            }, index=tickers)
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
@@ -5,87 +5,126 @@ import sys
 project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_path)
 
-from prophet import Prophet
 from utils.stock_data import get_stock_data
+from utils.forecasting import FORECASTERS, DEFAULT_FORECASTER, run_forecast
+from utils.downsampling import downsample_frame
+from utils.cache import ttl_cache
+from utils.panel_cache import render_panel
 import plotly.graph_objects as go
 
-def predict_and_plot_prophet(ticker, forecast_period=30):
+# Seconds a forecast stays cached, fitting the model is by far the most expensive stage of a search
+FORECAST_TTL = 6 * 3600
+
+@ttl_cache(FORECAST_TTL)
+def forecast_prices(ticker, forecast_period, backend):
+    """
+    Fetch the closing prices of a ticker and forecast them with a forecasting backend.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        forecast_period (int): Number of days to forecast.
+        backend (str): Forecasting backend, one of `utils.forecasting.FORECASTERS`.
+
+    Returns:
+        tuple: The history with 'ds' and 'y' columns, the forecast, and the fit and predict latency,
+            or None if the stock data could not be fetched.
+    """
+    # Fetch historical stock data (defaults to 5y period and 1d interval)
+    data = get_stock_data(ticker)
+
+    if data is None or 'Close' not in data:
+        return None
+
+    # Reset index to make the date a column and rename columns for Prophet
+    data = data.reset_index()  # Reset index to make date column explicit
+    data.rename(columns={'index': 'Date'}, inplace=True)  # Ensure the date column is named 'Date'
+    prophet_data = data[['Date', 'Close']].rename(columns={'Date': 'ds', 'Close': 'y'})
+
+    # Fit the forecasting model and predict the future dates
+    forecast, timings = run_forecast(prophet_data, forecast_period, backend)
+    return prophet_data, forecast, timings
+
+def predict_and_plot_prophet(ticker, forecast_period=30, max_points=None, backend=DEFAULT_FORECASTER, as_html=False):
     """
-    Use the Prophet model to predict stock prices and plot the results.
+    Use the Prophet model, or another forecasting backend, to predict stock prices and plot the results.
 
     Args:
         ticker (str): Stock ticker symbol.
         forecast_period (int): Number of days to forecast (default is 30).
+        max_points (int): Maximum number of points per trace, or None to plot every point.
+        backend (str): Forecasting backend, one of `utils.forecasting.FORECASTERS` (default is Prophet).
+        as_html (bool): Whether to return the HTML of the figure, served from the panel cache, instead of the figure.
 
     Returns:
         dict: A summary of the forecast, including the latest predicted price.
-        plotly.graph_objects.Figure: A Plotly figure object for the prediction plot.
+        plotly.graph_objects.Figure: A Plotly figure object (or its HTML) for the prediction plot.
     """
     try:
-        # Fetch historical stock data (defaults to 5y period and 1d interval)
-        data = get_stock_data(ticker)
+        # Forecasts are cached, see `forecast_prices`
+        result = forecast_prices(ticker, forecast_period, backend)
 
-        if data is None or 'Close' not in data:
+        if result is None:
             return {"error": "Failed to fetch stock data or invalid data format."}, None
 
-        # Reset index to make the date a column and rename columns for Prophet
-        data = data.reset_index()  # Reset index to make date column explicit
-        data.rename(columns={'index': 'Date'}, inplace=True)  # Ensure the date column is named 'Date'
-        prophet_data = data[['Date', 'Close']].rename(columns={'Date': 'ds', 'Close': 'y'})
-
-        # Initialize and fit the Prophet model
-        model = Prophet()
-        model.fit(prophet_data)
-
-        # Create a DataFrame for future dates
-        future = model.make_future_dataframe(periods=forecast_period)
-        forecast = model.predict(future)
-
-        # Create Plotly figure
-        fig = go.Figure()
-
-        # Plot historical closing prices
-        fig.add_trace(go.Scatter(
-            x=prophet_data['ds'],
-            y=prophet_data['y'],
-            mode='lines',
-            name='Historical Closing Prices',
-            line=dict(color='blue')
-        ))
-
-        # Plot predicted prices
-        fig.add_trace(go.Scatter(
-            x=forecast['ds'],
-            y=forecast['yhat'],
-            mode='lines',
-            name='Predicted Prices',
-            line=dict(color='green')
-        ))
-
-        # Plot confidence intervals
-        fig.add_trace(go.Scatter(
-            x=forecast['ds'],
-            y=forecast['yhat_upper'],
-            mode='lines',
-            name='Upper Confidence Interval',
-            line=dict(dash='dot', color='green')
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=forecast['ds'],
-            y=forecast['yhat_lower'],
-            mode='lines',
-            name='Lower Confidence Interval',
-            line=dict(dash='dot', color='green')
-        ))
-
-        # Customize layout
-        fig.update_layout(
-            title=f"{ticker.upper()} Stock Price Prediction (Prophet)",
-            xaxis_title="Date",
-            yaxis_title="Price (USD)",
-            xaxis_rangeslider_visible=True
-        )
+        prophet_data, forecast, timings = result
+
+        # Reduce the plotted history and forecast to what the viewport can display
+        plot_history = downsample_frame(prophet_data, 'y', max_points)
+        plot_forecast = downsample_frame(forecast, 'yhat', max_points)
+
+        def build_figure():
+            # Create Plotly figure
+            fig = go.Figure()
+
+            # Plot historical closing prices
+            fig.add_trace(go.Scatter(
+                x=plot_history['ds'],
+                y=plot_history['y'],
+                mode='lines',
+                name='Historical Closing Prices',
+                line=dict(color='blue')
+            ))
+
+            # Plot predicted prices
+            fig.add_trace(go.Scatter(
+                x=plot_forecast['ds'],
+                y=plot_forecast['yhat'],
+                mode='lines',
+                name='Predicted Prices',
+                line=dict(color='green')
+            ))
+
+            # Plot confidence intervals (not estimated by every backend)
+            if 'yhat_upper' in plot_forecast:
+                fig.add_trace(go.Scatter(
+                    x=plot_forecast['ds'],
+                    y=plot_forecast['yhat_upper'],
+                    mode='lines',
+                    name='Upper Confidence Interval',
+                    line=dict(dash='dot', color='green')
+                ))
+
+                fig.add_trace(go.Scatter(
+                    x=plot_forecast['ds'],
+                    y=plot_forecast['yhat_lower'],
+                    mode='lines',
+                    name='Lower Confidence Interval',
+                    line=dict(dash='dot', color='green')
+                ))
+
+            # Customize layout
+            fig.update_layout(
+                title=f"{ticker.upper()} Stock Price Prediction ({FORECASTERS[backend][0]})",
+                xaxis_title="Date",
+                yaxis_title="Price (USD)",
+                xaxis_rangeslider_visible=True
+            )
+            return fig
+
+        fig = render_panel(
+            "prophet", ticker, (forecast_period, max_points, backend),
+            (plot_history, plot_forecast), build_figure
+        ) if as_html else build_figure()
 
         # Get the latest prediction
         latest_forecast = forecast[['ds', 'yhat']].iloc[-1]
@@ -104,7 +143,9 @@ def predict_and_plot_prophet(ticker, forecast_period=30):
         # Return the message and figure
         return {
             "prediction_message": prediction_message,
-            "latest_date": latest_date
+            "latest_date": latest_date,
+            "backend": backend,
+            **timings
         }, fig
 
     except Exception as e:
@@ -0,0 +1,367 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import yfinance as yf
+
+from utils.shared_data import read_shared_history
+
+# Intervals that can be derived locally from the daily base series, as pandas resampling rules.
+# yfinance labels weekly bars with the Monday and monthly/quarterly bars with the first day.
+RESAMPLE_RULES = {
+    "1d": None,
+    "1wk": "W-MON",
+    "1mo": "MS",
+    "3mo": "QS",
+}
+
+# Columns kept by the compact representation of the price history
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Float dtype of the cached daily series, "float32" halves their size at the cost of precision
+BASE_SERIES_DTYPE = "float64"
+
+# How the columns of a bar are aggregated when resampling to a coarser interval
+OHLCV_AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+# Lengths of the yfinance periods, "max" and "ytd" are handled separately
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# yfinance periods counted in trading days rather than calendar days, as their number of bars.
+# They are sliced from the cached bars of `TRADING_DAY_PERIOD_SOURCE`, which always holds enough of them.
+TRADING_DAY_PERIODS = {"1d": 1, "5d": 5}
+TRADING_DAY_PERIOD_SOURCE = "1mo"
+
+# Seconds after which the latest bars of a cached base series are fetched again
+REFRESH_INTERVAL = 15 * 60
+
+# Seconds after which a cached base series is downloaded again in full. yfinance adjusts all the past
+# prices for splits and dividends, so bars appended to an older download may be on another price basis.
+FULL_RELOAD_INTERVAL = 24 * 3600
+
+# Maximum number of tickers whose daily series is cached, the least recently used are evicted first
+BASE_SERIES_MAX_TICKERS = 500
+
+# Daily base series per ticker, in compact form:
+# {"data": DataFrame, "start": Timestamp or None for "max", "fetched_at": float, "loaded_at": float}.
+# A lock per ticker serializes its updates, the global lock only guards the two dicts.
+_base_series = OrderedDict()
+_ticker_locks = {}
+_lock = threading.Lock()
+
+
+def period_start(period, now):
+    """
+    Return the first date covered by a yfinance period, or None for the whole history.
+
+    Periods counted in trading days start with the period they are sliced from (see `TRADING_DAY_PERIODS`).
+
+    Args:
+        period (str): yfinance period such as "1y", "ytd" or "max".
+        now (pandas.Timestamp): Current time, in the timezone of the data.
+
+    Returns:
+        pandas.Timestamp: The start of the period.
+    """
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    if period in TRADING_DAY_PERIODS:
+        period = TRADING_DAY_PERIOD_SOURCE
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period '{period}'.")
+    return now.normalize() - PERIOD_OFFSETS[period]
+
+
+def is_local_period(period):
+    """
+    Whether a yfinance period can be sliced from the cached daily series.
+    """
+    return period in PERIOD_OFFSETS or period in TRADING_DAY_PERIODS or period in ("ytd", "max")
+
+
+def slice_period(data, period):
+    """
+    Keep the bars of a daily series that fall within a yfinance period.
+
+    Args:
+        data (pandas.DataFrame): Daily bars with a tz-aware DatetimeIndex.
+        period (str): yfinance period, see `is_local_period`.
+
+    Returns:
+        pandas.DataFrame: A positional slice of `data`.
+    """
+    if period in TRADING_DAY_PERIODS:
+        return data.iloc[-TRADING_DAY_PERIODS[period]:]
+    start = period_start(period, pd.Timestamp.now(tz=data.index.tz))
+    return data.iloc[data.index.searchsorted(start):] if start is not None else data
+
+
+def resample_ohlcv(data, interval):
+    """
+    Resample daily OHLCV bars to a coarser interval.
+
+    Args:
+        data (pandas.DataFrame): Daily bars with a DatetimeIndex.
+        interval (str): Target interval, one of `RESAMPLE_RULES`.
+
+    Returns:
+        pandas.DataFrame: The resampled bars, without empty periods.
+    """
+    rule = RESAMPLE_RULES[interval]
+    if rule is None:
+        return data
+
+    aggregation = {column: how for column, how in OHLCV_AGGREGATION.items() if column in data}
+    resampled = data.resample(rule, closed="left", label="left").agg(aggregation)
+    return resampled.dropna(subset=["Close"])
+
+
+def _merge(older, newer):
+    """
+    Concatenate two slices of a series, the bars of `newer` replacing the overlapping ones.
+    """
+    merged = pd.concat([older, newer])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+
+def compact_stock_data(data, dtype="float64", columns=PRICE_COLUMNS, naive_index=True):
+    """
+    Reduce raw historical data to a compact, typed DataFrame.
+
+    Only the OHLCV columns are kept, cast to a single float dtype, and the tz-aware index
+    is turned into a naive `datetime64` index instead of an object index of `date` objects.
+
+    Args:
+        data (pandas.DataFrame): Historical data as returned by yfinance.
+        dtype (str): Float dtype of the kept columns, "float32" or "float64" (default is "float64").
+        columns (list): Columns to keep (default is OHLCV).
+        naive_index (bool): Whether to drop the timezone of the index (default is True).
+
+    Returns:
+        pandas.DataFrame: The compact historical data.
+    """
+    compact = data[[column for column in columns if column in data]].astype(dtype)
+
+    index = data.index
+    if naive_index and getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    compact.index = pd.DatetimeIndex(index, name=None)
+
+    return compact
+
+
+def fetch_latest_bars(stock, data):
+    """
+    Download the bars from the last one of `data` onwards and merge them into it.
+
+    The last bar is fetched again since it may still have been in progress. When the new bars
+    include a dividend or a split, yfinance has adjusted all the earlier prices for it, so the
+    bars of `data` are on another price basis and the whole history must be downloaded again.
+
+    Args:
+        stock (yfinance.Ticker): The ticker to download.
+        data (pandas.DataFrame): Daily bars with a tz-aware DatetimeIndex.
+
+    Returns:
+        pandas.DataFrame: The bars of `data` followed by the new ones, or None if the new bars include a dividend or a split.
+    """
+    newer = stock.history(start=data.index[-1].strftime("%Y-%m-%d"), interval="1d")
+    if newer.empty:
+        return data
+
+    new_bars = newer[newer.index > data.index[-1]]
+    for column in ("Dividends", "Stock Splits"):
+        if column in new_bars and (new_bars[column] != 0).any():
+            return None
+    return _merge(data, newer)
+
+
+def download_history(stock, start):
+    """
+    Download the daily bars of a ticker from `start` onwards, or the whole history if `start` is None.
+    """
+    if start is None:
+        return stock.history(period="max", interval="1d")
+    return stock.history(start=start.strftime("%Y-%m-%d"), interval="1d")
+
+
+def _ticker_lock(ticker):
+    """
+    Lock serializing the updates of the cached series of a ticker.
+    """
+    with _lock:
+        return _ticker_locks.setdefault(ticker, threading.Lock())
+
+
+def _store_base_series(ticker, entry):
+    """
+    Cache the daily series of a ticker, evicting the least recently used ones beyond `BASE_SERIES_MAX_TICKERS`.
+    """
+    with _lock:
+        _base_series[ticker] = entry
+        _base_series.move_to_end(ticker)
+        while len(_base_series) > BASE_SERIES_MAX_TICKERS:
+            evicted, _ = _base_series.popitem(last=False)
+            lock = _ticker_locks.get(evicted)
+            if lock is not None and not lock.locked():
+                del _ticker_locks[evicted]
+
+
+def _refresh_base_series(ticker, period):
+    """
+    Make sure the cached daily series of a ticker covers `period` and is up to date.
+
+    Only the missing range is downloaded: older bars when a longer period is requested,
+    and the latest bars once the cached ones are older than `REFRESH_INTERVAL`. The whole
+    series is downloaded again after a dividend or a split, and every `FULL_RELOAD_INTERVAL`.
+    The series is kept in compact form, without the dividends and splits columns.
+    Must be called with the lock of the ticker held.
+    """
+    stock = yf.Ticker(ticker)
+    with _lock:
+        entry = _base_series.get(ticker)
+        if entry is not None:
+            _base_series.move_to_end(ticker)
+
+    if entry is None:
+        data = stock.history(period=TRADING_DAY_PERIOD_SOURCE if period in TRADING_DAY_PERIODS else period, interval="1d")
+        if data.empty:
+            return None
+        start = period_start(period, pd.Timestamp.now(tz=data.index.tz))
+        data = compact_stock_data(data, BASE_SERIES_DTYPE, naive_index=False)
+        entry = {"data": data, "start": start, "fetched_at": time.time(), "loaded_at": time.time()}
+        _store_base_series(ticker, entry)
+        return entry
+
+    data = entry["data"]
+    start = period_start(period, pd.Timestamp.now(tz=data.index.tz))
+
+    # Fetch the older bars the cache does not hold yet
+    if entry["start"] is not None and (start is None or start < entry["start"]):
+        if start is None:
+            older = stock.history(period="max", interval="1d")
+        else:
+            older = stock.history(start=start.strftime("%Y-%m-%d"), end=data.index[0].strftime("%Y-%m-%d"), interval="1d")
+        data = compact_stock_data(_merge(older, data), BASE_SERIES_DTYPE, naive_index=False)
+        entry["start"] = start
+
+    # Fetch the latest bars again once they are older than the refresh interval
+    reload = time.time() - entry["loaded_at"] > FULL_RELOAD_INTERVAL
+    if not reload and time.time() - entry["fetched_at"] > REFRESH_INTERVAL:
+        latest = fetch_latest_bars(stock, data)
+        if latest is None:
+            reload = True
+        else:
+            data = compact_stock_data(latest, BASE_SERIES_DTYPE, naive_index=False)
+            entry["fetched_at"] = time.time()
+
+    # Download the whole series again, so that all its prices are adjusted on the same basis
+    if reload:
+        full = download_history(stock, entry["start"])
+        if not full.empty:
+            data = compact_stock_data(full, BASE_SERIES_DTYPE, naive_index=False)
+            entry["fetched_at"] = entry["loaded_at"] = time.time()
+
+    entry["data"] = data
+    return entry
+
+
+def _shared_history(ticker, period):
+    """
+    Daily bars of a ticker over `period` from the shared data, or None if they are not shared over the whole period.
+    """
+    shared, shared_start = read_shared_history(ticker, "1d")
+    if shared is None:
+        return None
+    start = period_start(period, pd.Timestamp.now(tz=shared.index.tz))
+    if shared_start is not None and (start is None or start < shared_start):
+        return None
+    return slice_period(shared, period)
+
+
+def cached_history(ticker, period="1y"):
+    """
+    Daily bars of a ticker over `period` if they are already cached and up to date, without downloading anything.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        period (str): Period of data (default is "1y").
+
+    Returns:
+        pandas.DataFrame: The bars with a tz-aware DatetimeIndex, or None if they are not cached.
+    """
+    if not is_local_period(period):
+        return None
+
+    shared = _shared_history(ticker, period)
+    if shared is not None:
+        return shared
+
+    ticker = ticker.upper()
+    with _ticker_lock(ticker):
+        with _lock:
+            entry = _base_series.get(ticker)
+        if entry is None or time.time() - entry["fetched_at"] > REFRESH_INTERVAL:
+            return None
+        data = entry["data"]
+        start = period_start(period, pd.Timestamp.now(tz=data.index.tz))
+        if entry["start"] is not None and (start is None or start < entry["start"]):
+            return None
+
+    return slice_period(data, period)
+
+
+def load_history(ticker, period="1y", interval="1d"):
+    """
+    Load historical bars for a ticker, deriving them locally from a cached daily series when possible.
+
+    Daily, weekly, monthly and quarterly bars over any period are all resampled from a single
+    daily series per ticker, so only the range that is not cached yet is fetched remotely.
+    When several worker processes run, the series of the hot tickers is read from the shared data
+    (see `utils.shared_data`) instead. Intraday intervals are fetched from yfinance directly.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        period (str): Period of data to load (default is "1y").
+        interval (str): Interval between bars (default is "1d").
+
+    Returns:
+        pandas.DataFrame: The bars with the tz-aware DatetimeIndex returned by yfinance (empty if no data was found).
+    """
+    if interval not in RESAMPLE_RULES or not is_local_period(period):
+        return yf.Ticker(ticker).history(period=period, interval=interval)
+
+    # Use the daily series published by the shared data refresher when it covers the period.
+    # It is a read-only view of shared memory, sliced positionally so that it is not copied.
+    shared = _shared_history(ticker, period)
+    if shared is not None:
+        return resample_ohlcv(shared, interval)
+
+    ticker = ticker.upper()
+    with _ticker_lock(ticker):
+        entry = _refresh_base_series(ticker, period)
+        if entry is None:
+            return pd.DataFrame()
+        data = entry["data"]
+
+    data = slice_period(data, period)
+
+    # Return a copy so that callers adding columns do not alter the cached series
+    return resample_ohlcv(data, interval).copy()
@@ -0,0 +1,212 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from utils.file_lock import process_lock
+
+# Directory holding the memory-mapped price files shared by the worker processes, disabled when unset.
+# A tmpfs such as /dev/shm keeps the data in memory.
+SHARED_DATA_DIR = os.getenv("SHARED_DATA_DIR")
+
+# Layout of a row of the price files: UTC timestamp in seconds, then the OHLCV columns
+SHARED_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+ROW_WIDTH = len(SHARED_COLUMNS) + 1
+
+# Seconds between two refreshes of the shared data. Readers ignore entries older than twice that,
+# e.g. when no process is refreshing them anymore, and load the history themselves instead.
+SHARED_DATA_REFRESH_INTERVAL = 15 * 60
+SHARED_DATA_MAX_AGE = 2 * SHARED_DATA_REFRESH_INTERVAL
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "refresher.lock"
+
+_reader_lock = threading.Lock()
+_reader = {"mtime": None, "index": None, "prices": None}
+
+# Time of the last full download of each ticker by the refresher of this process
+_loaded_at = {}
+
+
+def _key(ticker, interval):
+    return f"{ticker.upper()}|{interval}"
+
+
+def write_shared_data(frames, directory=SHARED_DATA_DIR):
+    """
+    Write price histories to a new memory-mapped file and publish its index.
+
+    All the histories are stored back to back in one float64 file. The index maps each ticker
+    and interval to its offset and number of rows, and is replaced atomically so that readers
+    switch to the new file at once. The previous file is kept for readers still using it.
+
+    Args:
+        frames (dict): {(ticker, interval): (data, start)} where `data` has a tz-aware DatetimeIndex
+            and `start` is the first date the history covers, or None for the whole history.
+        directory (str): Directory of the shared data.
+    """
+    os.makedirs(directory, exist_ok=True)
+    file_name = f"prices-{time.time_ns()}.bin"
+    total_rows = sum(len(data) for data, _ in frames.values())
+
+    prices = np.memmap(os.path.join(directory, file_name), dtype=np.float64, mode="w+", shape=(max(total_rows, 1), ROW_WIDTH))
+    entries = {}
+    offset = 0
+    for (ticker, interval), (data, start) in frames.items():
+        rows = len(data)
+        utc_index = data.index.tz_convert("UTC")
+        prices[offset:offset + rows, 0] = (utc_index - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+        prices[offset:offset + rows, 1:] = data[SHARED_COLUMNS].to_numpy(dtype=np.float64)
+        entries[_key(ticker, interval)] = {
+            "offset": offset,
+            "rows": rows,
+            "tz": str(data.index.tz),
+            "start": start.isoformat() if start is not None else None,
+            "updated": time.time()
+        }
+        offset += rows
+    prices.flush()
+    del prices
+
+    index_path = os.path.join(directory, INDEX_FILE)
+    with open(index_path + ".tmp", "w") as f:
+        json.dump({"file": file_name, "entries": entries}, f)
+    os.replace(index_path + ".tmp", index_path)
+
+    # Keep the current and the previous file, readers already mapping older ones keep their mapping
+    for path in sorted(glob.glob(os.path.join(directory, "prices-*.bin")))[:-2]:
+        os.remove(path)
+
+
+def read_shared_history(ticker, interval="1d", directory=SHARED_DATA_DIR, max_age=SHARED_DATA_MAX_AGE):
+    """
+    Return a read-only view of the price history of a ticker in the shared data, without copying the prices.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        interval (str): Interval between bars (default is "1d").
+        directory (str): Directory of the shared data.
+        max_age (float): Seconds after which an entry is considered stale, None to accept any entry.
+
+    Returns:
+        pandas.DataFrame: OHLCV bars with a tz-aware DatetimeIndex, or None if the ticker is not shared or is stale.
+        pandas.Timestamp: The first date the history covers, or None for the whole history.
+    """
+    if not directory:
+        return None, None
+
+    index_path = os.path.join(directory, INDEX_FILE)
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except FileNotFoundError:
+        return None, None
+
+    with _reader_lock:
+        # Map the new price file once the refresher has published it
+        if mtime != _reader["mtime"]:
+            with open(index_path) as f:
+                index = json.load(f)
+            prices_path = os.path.join(directory, index["file"])
+            rows = os.path.getsize(prices_path) // (ROW_WIDTH * 8)
+            _reader.update(
+                mtime=mtime,
+                index=index,
+                prices=np.memmap(prices_path, dtype=np.float64, mode="r", shape=(rows, ROW_WIDTH))
+            )
+        entry = _reader["index"]["entries"].get(_key(ticker, interval))
+        prices = _reader["prices"]
+
+    if entry is None or (max_age is not None and time.time() - entry["updated"] > max_age):
+        return None, None
+
+    values = prices[entry["offset"]:entry["offset"] + entry["rows"]]
+    index = pd.to_datetime(values[:, 0], unit="s", utc=True).tz_convert(entry["tz"])
+    data = pd.DataFrame(values[:, 1:], index=index, columns=SHARED_COLUMNS, copy=False)
+    start = pd.Timestamp(entry["start"]) if entry["start"] else None
+    return data, start
+
+
+def refresh_shared_data(tickers, period="5y", directory=SHARED_DATA_DIR, calls_per_second=2):
+    """
+    Update the daily history of the given tickers and publish it to the shared data.
+
+    For the tickers already shared over the whole period, only the bars from the last stored one
+    onwards are downloaded. The whole period is downloaded for the other tickers, after a dividend
+    or a split (yfinance then adjusts all the past prices), and once a day (`FULL_RELOAD_INTERVAL`).
+    A process taking over as the refresher downloads every ticker in full at its first refresh.
+
+    Returns:
+        list: The tickers that could not be fetched.
+    """
+    # Imported here, the warm-up module itself loads the price history through this module
+    from utils.resampling import period_start, fetch_latest_bars, FULL_RELOAD_INTERVAL
+    from utils.warmup import RateLimiter, YFINANCE_RATE_PATH
+
+    limiter = RateLimiter(calls_per_second, YFINANCE_RATE_PATH)
+    frames = {}
+    failed = []
+    for ticker in tickers:
+        try:
+            limiter.wait()
+            stock = yf.Ticker(ticker)
+            data, start = read_shared_history(ticker, "1d", directory, max_age=None)
+            if data is not None and time.time() - _loaded_at.get(ticker, 0) <= FULL_RELOAD_INTERVAL:
+                new_start = period_start(period, pd.Timestamp.now(tz=data.index.tz))
+                if start is None or (new_start is not None and new_start >= start):
+                    latest = fetch_latest_bars(stock, data)
+                    if latest is not None:
+                        latest = latest[SHARED_COLUMNS]
+                        if new_start is not None:
+                            latest = latest.iloc[latest.index.searchsorted(new_start):]
+                        frames[(ticker, "1d")] = (latest, new_start)
+                        continue
+
+            data = stock.history(period=period, interval="1d")
+            if data.empty:
+                failed.append(ticker)
+                continue
+            frames[(ticker, "1d")] = (data, period_start(period, pd.Timestamp.now(tz=data.index.tz)))
+            _loaded_at[ticker] = time.time()
+        except Exception as e:
+            print(f"Error fetching shared data for ticker {ticker}: {e}")
+            failed.append(ticker)
+
+    if frames:
+        write_shared_data(frames, directory)
+    return failed
+
+
+def start_shared_data_refresher(n=200, interval_seconds=SHARED_DATA_REFRESH_INTERVAL, period="5y", directory=SHARED_DATA_DIR):
+    """
+    Refresh the shared data for the `n` most requested tickers every `interval_seconds` in a background thread.
+
+    Every worker process may call this: a file lock makes a single process the refresher,
+    and another one takes over if that process exits.
+
+    Returns:
+        threading.Thread: The refresher thread.
+    """
+    from utils.warmup import top_tickers
+
+    os.makedirs(directory, exist_ok=True)
+    is_refresher = process_lock(os.path.join(directory, LOCK_FILE))
+
+    def loop():
+        while True:
+            if is_refresher():
+                try:
+                    tickers = top_tickers(n)
+                    failed = refresh_shared_data(tickers, period=period, directory=directory)
+                    print(f"Shared data refreshed for {len(tickers) - len(failed)} tickers.")
+                except Exception as e:
+                    print(f"Error refreshing shared data: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread
@@ -1,4 +1,12 @@
+import time
+
+import pandas as pd
 import yfinance as yf
+from utils.resampling import load_history, compact_stock_data
+from utils.cache import ttl_cache
+
+# Number of tickers downloaded per yfinance request
+DOWNLOAD_BATCH_SIZE = 500
 
 def format_market_cap(market_cap):
     """
@@ -13,6 +21,7 @@ def format_market_cap(market_cap):
     else:  # Smaller numbers
         return f"${market_cap:.2f}"
 
+@ttl_cache(12 * 3600)
 def get_stock_info(ticker):
     """
     Fetch stock information for a given ticker and return a formatted dictionary.
@@ -41,18 +50,33 @@ def get_stock_info(ticker):
         print(f"Error fetching stock info for ticker {ticker}: {e}")
         return None
 
-def get_stock_data(ticker, period="1y", interval="1d"):
+def get_stock_data(ticker, period="1y", interval="1d", compact=False, dtype="float64"):
     """
     Fetch historical stock data for a given ticker, period, and interval.
+
+    Daily and coarser intervals are derived from a cached daily series (see `utils.resampling`),
+    so only the range that is not cached yet is downloaded.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        period (str): Period of data to fetch (default is "1y").
+        interval (str): Interval between data points (default is "1d").
+        compact (bool): Whether to return the compact representation (see `compact_stock_data`).
+        dtype (str): Float dtype of the OHLCV columns in the compact representation (default is "float64").
+
+    Returns:
+        pandas.DataFrame: The historical stock data, or None if it could not be fetched.
     """
     try:
-        # Fetch historical stock data using yfinance
-        stock = yf.Ticker(ticker)
-        data = stock.history(period=period, interval=interval)
+        # Fetch historical stock data using yfinance, or derive it from the cached daily series
+        data = load_history(ticker, period=period, interval=interval)
         
         if data.empty:
             raise ValueError(f"No data found for ticker {ticker} with period '{period}' and interval '{interval}'.")
-        
+
+        if compact:
+            return compact_stock_data(data, dtype=dtype)
+
         data.index = data.index.date
 
         return data
@@ -61,3 +85,67 @@ def get_stock_data(ticker, period="1y", interval="1d"):
         print(f"Error fetching stock data for ticker {ticker}: {e}")
         return None
 
+def fetch_closes(tickers, period="1y"):
+    """
+    Download the daily closing prices of many tickers in batches, a single request per batch.
+
+    Returns:
+        pandas.DataFrame: Closing prices with one column per ticker.
+    """
+    closes = []
+    for i in range(0, len(tickers), DOWNLOAD_BATCH_SIZE):
+        batch = tickers[i:i + DOWNLOAD_BATCH_SIZE]
+        data = yf.download(batch, period=period, interval="1d", auto_adjust=True, progress=False)
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(batch[0])
+        closes.append(close)
+    return pd.concat(closes, axis=1).dropna(how="all")
+
+def measure_compact_history(data, repeats=20):
+    """
+    Measure the memory, indicator and plotting time of the default and compact representations of a history.
+
+    Args:
+        data (pandas.DataFrame): Historical data as returned by yfinance.
+        repeats (int): Number of times each path is run per representation (default is 20).
+
+    Returns:
+        dict: Bytes used, seconds per indicator computation and seconds per figure build and serialization
+            for the "default" (object index of dates), "compact_float64" and "compact_float32" representations.
+    """
+    # Imported here, the indicators module itself loads the price history through this module
+    import plotly.graph_objects as go
+    from utils.indicators import compute_rsi, compute_macd
+
+    default = data.copy()
+    default.index = default.index.date
+    representations = {
+        "default": default,
+        "compact_float64": compact_stock_data(data, dtype="float64"),
+        "compact_float32": compact_stock_data(data, dtype="float32"),
+    }
+
+    results = {}
+    for name, frame in representations.items():
+        # Measured first, label lookups add the hash table of the index to its memory usage
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        start = time.perf_counter()
+        for _ in range(repeats):
+            close = frame["Close"]
+            close.rolling(window=50).mean()
+            compute_rsi(close)
+            compute_macd(close)
+            frame.loc[frame.index[len(frame) // 2]:]
+        indicator_seconds = (time.perf_counter() - start) / repeats
+
+        # Build and serialize a closing price figure, as the panels do
+        start = time.perf_counter()
+        for _ in range(repeats):
+            go.Figure(go.Scatter(x=frame.index, y=frame["Close"], mode="lines")).to_json()
+        results[name] = {
+            "bytes": nbytes,
+            "seconds": indicator_seconds,
+            "plot_seconds": (time.perf_counter() - start) / repeats
+        }
+    return results
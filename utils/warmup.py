@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from utils.file_lock import locked_file
+from utils.resampling import cached_history, REFRESH_INTERVAL
+from utils.stock_data import get_stock_info, get_stock_data
+from utils.prophet_model import forecast_prices
+from utils.forecasting import DEFAULT_FORECASTER
+from utils.sentiment_analysis import sentiment_news_analysis
+
+# Requests per ticker and day, and how many of them were served from a warm cache
+ACCESS_LOG_PATH = "access_counts.json"
+# Days of request counts kept, and used to rank the tickers to warm up
+ACCESS_HISTORY_DAYS = 30
+RANKING_DAYS = 7
+
+# Bounded concurrency of the warm-up and request rates allowed toward each upstream source
+WARMUP_WORKERS = 4
+YFINANCE_CALLS_PER_SECOND = 2
+NEWSAPI_CALLS_PER_SECOND = 1
+
+# Files holding the schedule of the rate limits, shared by all the worker processes
+YFINANCE_RATE_PATH = "yfinance_rate.json"
+NEWSAPI_RATE_PATH = "newsapi_rate.json"
+
+# During the session, the warm-up runs again every WARMUP_INTERVAL seconds until WARMUP_UNTIL (local time),
+# so that the cached prices, forecasts and news sentiment of the top tickers do not expire in between
+WARMUP_INTERVAL = REFRESH_INTERVAL
+WARMUP_UNTIL = "16:00"
+
+# Forecast horizon used by /search, so that warmed forecasts are the ones requested
+SEARCH_FORECAST_PERIOD = 60
+
+_access_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Space out calls to an upstream source so that at most `calls_per_second` are made.
+
+    With a `path`, the time of the next allowed call is kept in that file under a file lock,
+    so that the limit holds across all the worker processes of the app.
+    """
+
+    def __init__(self, calls_per_second, path=None):
+        self.interval = 1.0 / calls_per_second
+        self.path = path
+        self.next_call = time.time()
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        # Take the next call slot, and return how long to wait for it
+        now = time.time()
+        delay = self.next_call - now
+        self.next_call = max(now, self.next_call) + self.interval
+        return delay
+
+    def wait(self):
+        with self.lock:
+            if self.path is None:
+                delay = self._reserve()
+            else:
+                with locked_file(self.path):
+                    try:
+                        with open(self.path) as f:
+                            self.next_call = json.load(f)["next_call"]
+                    except (OSError, ValueError, KeyError):
+                        pass
+                    delay = self._reserve()
+                    with open(self.path + ".tmp", "w") as f:
+                        json.dump({"next_call": self.next_call}, f)
+                    os.replace(self.path + ".tmp", self.path)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _load_access_log(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Error reading the access log {path}: {e}")
+        return {}
+
+
+def record_access(ticker, warm, path=ACCESS_LOG_PATH):
+    """
+    Count a request for a ticker, and whether it was served from a warm cache.
+
+    Every worker process updates the same log, so the update is made under a file lock and the
+    log is replaced atomically. Failures are only logged, counting must never fail a request.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        warm (bool): Whether the expensive results for the ticker were already cached.
+        path (str): Path of the access log.
+    """
+    today = date.today().isoformat()
+    oldest = (date.today() - timedelta(days=ACCESS_HISTORY_DAYS)).isoformat()
+
+    try:
+        with _access_lock, locked_file(path):
+            log = {day: counts for day, counts in _load_access_log(path).items() if day > oldest}
+            counts = log.setdefault(today, {"requests": {}, "warm": {}})
+            counts["requests"][ticker] = counts["requests"].get(ticker, 0) + 1
+            if warm:
+                counts["warm"][ticker] = counts["warm"].get(ticker, 0) + 1
+            with open(path + ".tmp", "w") as f:
+                json.dump(log, f)
+            os.replace(path + ".tmp", path)
+    except Exception as e:
+        print(f"Error recording access for ticker {ticker}: {e}")
+
+
+def is_warm(ticker, backend=DEFAULT_FORECASTER):
+    """
+    Whether the forecast and the news sentiment of a ticker, the slowest results of a search, are cached.
+    """
+    return (forecast_prices.is_cached(ticker, SEARCH_FORECAST_PERIOD, backend)
+            and sentiment_news_analysis.is_cached(ticker))
+
+
+def top_tickers(n, path=ACCESS_LOG_PATH):
+    """
+    The `n` most requested tickers over the last `RANKING_DAYS` days.
+    """
+    oldest = (date.today() - timedelta(days=RANKING_DAYS)).isoformat()
+    totals = Counter()
+    for day, counts in _load_access_log(path).items():
+        if day > oldest:
+            totals.update(counts["requests"])
+    return [ticker for ticker, _ in totals.most_common(n)]
+
+
+def warm_hit_rate(day=None, path=ACCESS_LOG_PATH):
+    """
+    Share of the requests of a day that were served from a warm cache.
+
+    Args:
+        day (str): ISO date of the day (default is today).
+        path (str): Path of the access log.
+
+    Returns:
+        dict: Number of requests, number of warm requests and their ratio.
+    """
+    counts = _load_access_log(path).get(day or date.today().isoformat(), {"requests": {}, "warm": {}})
+    requests = sum(counts["requests"].values())
+    warm = sum(counts["warm"].values())
+    return {
+        "requests": requests,
+        "warm_requests": warm,
+        "warm_ratio": warm / requests if requests else None
+    }
+
+
+def warm_ticker(ticker, yfinance_limiter, newsapi_limiter, backend=DEFAULT_FORECASTER, min_ttl=0):
+    """
+    Precompute and cache the price history, fundamentals, forecast and news sentiment of a ticker.
+
+    Results already cached are only computed again if they expire within `min_ttl` seconds,
+    e.g. before the next warm-up.
+
+    Returns:
+        bool: Whether every stage succeeded.
+    """
+    try:
+        # The history may already be cached, e.g. in the shared data, without any upstream call.
+        # Otherwise its latest bars are fetched again.
+        if cached_history(ticker) is None:
+            yfinance_limiter.wait()
+        if get_stock_data(ticker) is None:
+            return False
+
+        ok = True
+        if get_stock_info.expires_in(ticker) <= min_ttl:
+            yfinance_limiter.wait()
+            ok = get_stock_info.refresh(ticker) is not None
+
+        # The forecast is computed from the cached history without upstream calls; the indicators
+        # are cheap to compute once the history is cached, so they are not precomputed
+        if forecast_prices.expires_in(ticker, SEARCH_FORECAST_PERIOD, backend) <= min_ttl:
+            ok = forecast_prices.refresh(ticker, SEARCH_FORECAST_PERIOD, backend) is not None and ok
+
+        if sentiment_news_analysis.expires_in(ticker) <= min_ttl:
+            newsapi_limiter.wait()
+            ok = "error" not in sentiment_news_analysis.refresh(ticker) and ok
+        return ok
+
+    except Exception as e:
+        print(f"Error warming up ticker {ticker}: {e}")
+        return False
+
+
+def warm_up(n=200, workers=WARMUP_WORKERS, backend=DEFAULT_FORECASTER, min_ttl=0):
+    """
+    Warm the caches for the `n` most requested tickers.
+
+    Args:
+        n (int): Number of tickers to warm up (default is 200).
+        workers (int): Number of tickers warmed up concurrently.
+        backend (str): Forecasting backend whose forecasts are precomputed.
+        min_ttl (float): Cached results expiring within `min_ttl` seconds are computed again (default is 0).
+
+    Returns:
+        dict: The tickers warmed up, the ones that failed, the duration and yesterday's warm ratio.
+    """
+    start = time.time()
+    tickers = top_tickers(n)
+    yfinance_limiter = RateLimiter(YFINANCE_CALLS_PER_SECOND, YFINANCE_RATE_PATH)
+    newsapi_limiter = RateLimiter(NEWSAPI_CALLS_PER_SECOND, NEWSAPI_RATE_PATH)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda ticker: warm_ticker(ticker, yfinance_limiter, newsapi_limiter, backend, min_ttl), tickers))
+
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    return {
+        "warmed": [ticker for ticker, ok in zip(tickers, results) if ok],
+        "failed": [ticker for ticker, ok in zip(tickers, results) if not ok],
+        "seconds": time.time() - start,
+        "previous_day": warm_hit_rate(yesterday)
+    }
+
+
+def next_warmup(now, at="09:00", until=WARMUP_UNTIL, interval_seconds=WARMUP_INTERVAL):
+    """
+    Time of the next warm-up: every `interval_seconds` from `at` until `until`, then `at` the next day.
+
+    Args:
+        now (datetime.datetime): Current local time.
+        at (str): Local time of the first warm-up of the day, "HH:MM".
+        until (str): Local time after which the warm-up does not run again that day, "HH:MM".
+        interval_seconds (int): Seconds between two warm-ups during the session.
+
+    Returns:
+        datetime.datetime: The time of the next warm-up.
+    """
+    def today_at(time_of_day):
+        hour, minute = (int(part) for part in time_of_day.split(":"))
+        return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    first, last = today_at(at), today_at(until)
+    if now < first:
+        return first
+    next_run = first + timedelta(seconds=((now - first).total_seconds() // interval_seconds + 1) * interval_seconds)
+    if next_run <= last:
+        return next_run
+    return first + timedelta(days=1)
+
+
+def start_warmup_scheduler(at="09:00", n=200, run_at_startup=True, until=WARMUP_UNTIL, interval_seconds=WARMUP_INTERVAL):
+    """
+    Run `warm_up` every day at the local time `at`, e.g. before the market opens, and again every
+    `interval_seconds` until `until`, in a background thread.
+
+    Each run computes again the results that would expire before the next one, so that the top
+    tickers stay warm all session. The warmed caches are held in the memory of each process, so every
+    worker process runs its own warm-up. The rate limits toward the upstream sources are shared by all of them.
+
+    Returns:
+        threading.Thread: The scheduler thread.
+    """
+    def run():
+        try:
+            print(f"Warm-up finished: {warm_up(n, min_ttl=interval_seconds)}")
+        except Exception as e:
+            print(f"Error during warm-up: {e}")
+
+    def loop():
+        if run_at_startup:
+            run()
+        while True:
+            now = datetime.now()
+            time.sleep((next_warmup(now, at, until, interval_seconds) - now).total_seconds())
+            run()
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread